@@ -0,0 +1,243 @@
+# Times startup, filtering, toggling, theme switches and chart updates for
+# synthetic lists of 100 to 100k tasks. Each size runs in its own process so
+# peak RSS is per size. The GUI part needs a display; without one it starts
+# Xvfb if it is installed, otherwise only the store-level timings are run.
+# Results are compared against benchmarks/baseline.json unless another
+# --baseline is given; regenerate it with --save-baseline after a deliberate
+# change in speed, or on the machine the comparison is run on, since
+# timings from different hardware do not compare.
+# Usage: python benchmarks/app_bench.py [--sizes 100,1000,10000,100000]
+#        [--baseline FILE] [--save-baseline FILE] [--tolerance 0.25]
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+SIZES = (100, 1000, 10000, 100000)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+QUERY = "task 42"
+WORDS = ("report", "email", "groceries", "gym", "review", "invoice", "call", "plan", "read", "fix")
+# Seconds-valued metrics below this are noise and never flagged.
+MIN_DELTA = 0.002
+# Reported, but timed once as setup and too noisy to flag.
+UNFLAGGED = ("build_dataset",)
+
+
+def make_task(i):
+    from task_store import PRIORITIES, Subtask, Task, quotes
+    rnd = random.Random(i)
+    subtasks = [Subtask(f"step {j} of {i}", rnd.random() < 0.5) for j in range(rnd.choice((0, 0, 1, 2, 3)))]
+    return Task(
+        f"task {i} {rnd.choice(WORDS)}",
+        quotes[i % len(quotes)],
+        deadline=date.today() + timedelta(days=rnd.randint(-30, 60)) if rnd.random() < 0.8 else None,
+        completed=rnd.random() < 0.35,
+        notes=f"note for {rnd.choice(WORDS)} {i}" if i % 3 == 0 else "",
+        subtasks=subtasks,
+        priority=PRIORITIES[i % 3],
+    )
+
+
+def build_dataset(data_dir, count):
+    from todo_core import open_store
+    store, storage = open_store(data_dir, "journal")
+    store.add_many(make_task(i) for i in range(count))
+    storage.compact()
+    storage.close()
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def keystroke_time(search, repeat):
+    # Median over the prefixes of QUERY of the time one keystroke costs.
+    return statistics.median(timed(lambda q=QUERY[:n]: search(q), repeat) for n in range(1, len(QUERY) + 1))
+
+
+def run_gui(results, repeat):
+    start = time.perf_counter()
+    import tkinter as tk
+    import todo
+    root = tk.Tk()
+    app = todo.TodoApp(root)
+    root.update()
+    results["startup"] = time.perf_counter() - start
+    results["widgets"] = count_widgets(root)
+
+    def settle():
+        app.scheduler.flush()
+        root.update_idletasks()
+
+    def refresh():
+        app.refresh_tasks()
+        settle()
+    results["refresh_tasks"] = timed(refresh, repeat)
+
+    def keystroke(q):
+        app.search_var.set(q)
+        app.get_filtered_tasks(limit=50)
+    results["get_filtered_tasks_keystroke"] = keystroke_time(keystroke, repeat)
+    app.search_var.set("")
+    settle()
+
+    first = next(iter(todo.tasks)).id
+
+    def toggle():
+        app.toggle_task(first)
+        settle()
+    results["toggle_task"] = timed(toggle, repeat)
+
+    def switch():
+        app.switch_theme()
+        settle()
+    results["switch_theme"] = timed(switch, repeat)
+
+    counts = iter(range(1, 10 ** 6))
+
+    def chart():
+        # Waits for the rendered image to reach the window.
+        before = app.chart.image
+        app.show_pie_chart(next(counts), 50)
+        deadline = time.perf_counter() + 30
+        while app.chart.image is before and time.perf_counter() < deadline:
+            root.update()
+            time.sleep(0.001)
+    chart()
+    results["show_pie_chart"] = timed(chart, repeat)
+    store = todo.tasks
+    app.quit_app()
+    return store
+
+
+def run_size(count, gui, repeat):
+    data_dir = tempfile.mkdtemp(prefix="todo-bench-")
+    os.environ["TODO_DATA_DIR"] = data_dir
+    results = {}
+    try:
+        start = time.perf_counter()
+        build_dataset(data_dir, count)
+        results["build_dataset"] = time.perf_counter() - start
+        if gui:
+            run_gui(results, repeat)
+        from todo_core import filter_tasks, open_store
+        # A single open varies by a third from run to run, too much to
+        # compare against the baseline.
+        results["load_store"] = timed(lambda: open_store(data_dir, "journal")[1].close(), repeat)
+        store, storage = open_store(data_dir, "journal")
+        results["filter_keystroke"] = keystroke_time(
+            lambda q: (filter_tasks(store, q, "All", limit=50), store.counts(q, "All")), repeat)
+        first = next(iter(store)).id
+        results["store_toggle"] = timed(lambda: store.update(first, completed=not store.get(first).completed), repeat)
+        storage.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def start_display():
+    # Returns (env, xvfb process or None, whether the GUI can run).
+    env = dict(os.environ)
+    if env.get("DISPLAY"):
+        return env, None, True
+    if not shutil.which("Xvfb"):
+        return env, None, False
+    display = f":{random.randint(90, 190)}"
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    if proc.poll() is not None:
+        return env, None, False
+    env["DISPLAY"] = display
+    return env, proc, True
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'tasks':>7}  {'metric':<30} {'value':>12} {'baseline':>12} {'change':>8}")
+    for size, metrics in results.items():
+        base = baseline.get(size, {})
+        for name, value in metrics.items():
+            old = base.get(name)
+            change, shown = "", ""
+            if old:
+                shown = f"{old:.4f}"
+                change = f"{100 * (value - old) / old:+.0f}%"
+                slower = value > old * (1 + tolerance)
+                if slower and name not in UNFLAGGED and (name in ("widgets", "peak_rss_mb") or value - old > MIN_DELTA):
+                    regressions.append((size, name))
+                    change += " !"
+            print(f"{size:>7}  {name:<30} {value:>12.4f} {shown:>12} {change:>8}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="To-do list benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-gui", action="store_true", help="only run the store-level benchmarks")
+    parser.add_argument("--baseline", default=BASELINE, help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write these results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--gui", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        print(json.dumps(run_size(args.child, args.gui, args.repeat)))
+        return 0
+
+    env, xvfb, gui = start_display()
+    gui = gui and not args.no_gui
+    if not gui and not args.no_gui:
+        print("No display and no Xvfb: skipping the GUI benchmarks.", file=sys.stderr)
+    results = {}
+    try:
+        for size in map(int, args.sizes.split(",")):
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", str(size), "--repeat", str(args.repeat)]
+            if gui:
+                cmd.append("--gui")
+            out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+            results[str(size)] = json.loads(out.strip().splitlines()[-1])
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    baseline = {}
+    if args.baseline and os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} regression(s): " + ", ".join(f"{name} @ {size}" for size, name in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
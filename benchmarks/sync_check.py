@@ -0,0 +1,228 @@
+# Runs a sync server and several headless clients in one process, makes
+# random changes on every client at once and checks that all of them end up
+# with exactly the server's list. Also checks that batches added across id
+# blocks and adds with a clashing id lose no tasks, that clients renumbering
+# at the same time still agree, and times how long a change on one client
+# takes to show up on another. Exits 1 if any check fails.
+# Usage: python benchmarks/sync_check.py [--clients 4] [--tasks 1000]
+#        [--rounds 50] [--tcp] [--id-block 64]
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import sync
+from storage import snapshot_row
+from task_store import PRIORITIES, Subtask, Task, TaskStore, quotes
+
+
+def rows(store):
+    return [snapshot_row(store.order_key(task.id), task) for task in store]
+
+
+class ServerThread:
+    # The server's event loop runs on its own thread, as it would in its own
+    # process; the store is only touched from that loop.
+    def __init__(self, store, address):
+        self.loop = asyncio.new_event_loop()
+        self.server = sync.SyncServer(store)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.call(self.server.start(address))
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(10)
+
+    def rows(self):
+        async def snapshot():
+            return rows(self.server.store)
+        return self.call(snapshot())
+
+    def stop(self):
+        self.call(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def random_change(store, rnd, n):
+    ids = [task.id for task in store]
+    roll = rnd.random()
+    if not ids or roll < 0.22:
+        store.add(Task(f"client task {n}", rnd.choice(quotes), priority=rnd.choice(PRIORITIES)))
+    elif roll < 0.25:
+        store.add_many(Task(f"client batch {n}.{i}", rnd.choice(quotes)) for i in range(rnd.randint(2, 40)))
+    elif roll < 0.65:
+        store.update(rnd.choice(ids), completed=rnd.random() < 0.5)
+    elif roll < 0.75:
+        store.update(rnd.choice(ids), description=f"renamed {n}",
+                     deadline=date.today() + timedelta(days=rnd.randint(-5, 5)))
+    elif roll < 0.82:
+        store.update(rnd.choice(ids), subtasks=[Subtask(f"step {n}", rnd.random() < 0.5)])
+    elif roll < 0.92:
+        store.move(rnd.choice(ids), before_id=rnd.choice(ids) if rnd.random() < 0.8 else None)
+    else:
+        store.delete(rnd.choice(ids))
+
+
+def settle(clients, server, timeout=10):
+    # Polls every client until all of them match the server.
+    expected = None
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        for client in clients:
+            client.flush()
+        time.sleep(sync.BATCH_MS / 1000 * 2)
+        for client in clients:
+            client.poll(budget=1)
+        expected = server.rows()
+        if all(rows(client.store) == expected for client in clients):
+            return True, expected
+    return False, expected
+
+
+def batch_check(server, address, count=55):
+    # Two clients each add a batch in one add_many call, longer than half
+    # an id block, so both run past their first block mid-batch.
+    peers = [sync.SyncClient(TaskStore(), address) for _ in range(2)]
+    try:
+        before = len(server.rows())
+        for i, client in enumerate(peers):
+            client.store.add_many(Task(f"batch {i}.{j}", quotes[0]) for j in range(count))
+        ok, expected = settle(peers, server)
+        return ok and len(expected) == before + 2 * count
+    finally:
+        for client in peers:
+            client.close()
+
+
+def clash_check(server, address):
+    # A client handing out ids from another client's block (as with a stale
+    # block) must not lose either task: the server refuses the second add
+    # and the client re-adds its task under a new id.
+    first, second = (sync.SyncClient(TaskStore(), address) for _ in range(2))
+    try:
+        before = len(server.rows())
+        second.ids = list(first.ids)
+        first.store.add(Task("clash first", quotes[0]))
+        first.flush()
+        time.sleep(0.05)
+        second.store.add(Task("clash second", quotes[1]))
+        ok, expected = settle([first, second], server)
+        names = {row[2] for row in expected}
+        return ok and len(expected) == before + 2 and {"clash first", "clash second"} <= names
+    finally:
+        first.close()
+        second.close()
+
+
+def renumber_check(server, address, seed, rounds=40):
+    # Random moves rarely run out of room between two keys. Moving the last
+    # task in front of the second over and over halves the same gap each
+    # time, so both clients renumber, with adds the other has not seen yet.
+    rnd = random.Random(seed)
+    peers = [sync.SyncClient(TaskStore(), address) for _ in range(2)]
+    try:
+        n = 0
+        for _ in range(rounds):
+            for client in peers:
+                for _ in range(10):
+                    n += 1
+                    if rnd.random() < 0.1:
+                        client.store.add(Task(f"renumber add {n}", quotes[0]))
+                    else:
+                        ids = [task.id for task in client.store]
+                        client.store.move(ids[-1], before_id=ids[1])
+            for client in peers:
+                client.flush()
+            for client in peers:
+                client.poll(budget=0.005)
+        ok, _ = settle(peers, server)
+        return ok
+    finally:
+        for client in peers:
+            client.close()
+
+
+def latency(clients, repeat=50):
+    # Time from an update on the first client to it being applied on the last.
+    sender, receiver = clients[0], clients[-1]
+    task_id = next(iter(sender.store)).id
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        sender.store.update(task_id, notes=f"ping {i}")
+        sender.flush()
+        while not any(op == "update" and tid == task_id for op, tid, _ in receiver.poll(budget=1)):
+            time.sleep(0.0005)
+        times.append(time.perf_counter() - start)
+        sender.poll(budget=1)
+    return statistics.median(times), max(times)
+
+
+def run(clients=4, tasks=1000, rounds=50, tcp=False, id_block=64, seed=1):
+    sync.ID_BLOCK = id_block
+    folder = tempfile.mkdtemp(prefix="todo-sync-")
+    address = "127.0.0.1:8765" if tcp else os.path.join(folder, "sync.sock")
+    store = TaskStore()
+    store.add_many(Task(f"task {i}", quotes[i % len(quotes)], completed=i % 3 == 0) for i in range(tasks))
+    server = ServerThread(store, address)
+    rnd = random.Random(seed)
+    start = time.perf_counter()
+    peers = [sync.SyncClient(TaskStore(), address) for _ in range(clients)]
+    connect_time = (time.perf_counter() - start) / clients
+    try:
+        n = 0
+        for _ in range(rounds):
+            # Every client changes its own copy before seeing the others'.
+            for client in peers:
+                for _ in range(rnd.randint(1, 20)):
+                    n += 1
+                    random_change(client.store, rnd, n)
+                client.flush()
+            for client in peers:
+                client.poll(budget=0.005)
+        ok, expected = settle(peers, server)
+        median, worst = latency(peers) if ok else (0, 0)
+    finally:
+        for client in peers:
+            client.close()
+    try:
+        batches_ok = batch_check(server, address)
+        clash_ok = clash_check(server, address)
+        renumber_ok = renumber_check(server, address, seed)
+    finally:
+        server.stop()
+    ids = [row[1] for row in expected]
+    print(f"{clients} clients, {n:,} changes, {len(expected):,} tasks at the end")
+    print(f"connect + snapshot: {connect_time * 1000:.1f} ms per client")
+    if ok:
+        print(f"delta latency: median {median * 1000:.1f} ms, max {worst * 1000:.1f} ms")
+    print("all stores match the server" if ok and len(ids) == len(set(ids)) else "MISMATCH")
+    print("batches across id blocks: " + ("ok" if batches_ok else "TASKS LOST"))
+    print("clashing ids: " + ("ok" if clash_ok else "TASKS LOST"))
+    print("concurrent renumbers: " + ("ok" if renumber_ok else "MISMATCH"))
+    return ok and batches_ok and clash_ok and renumber_ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync server consistency check")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--tcp", action="store_true", help="use localhost TCP instead of a Unix socket")
+    parser.add_argument("--id-block", type=int, default=64, help="small blocks exercise block hand-over")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    ok = run(args.clients, args.tasks, args.rounds, args.tcp, args.id_block, args.seed)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Bytes per task for the old dict-based Task and the slotted one.
+# Usage: python benchmarks/task_memory.py [count]
+import os
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from task_store import Subtask, Task, quotes
+
+
+class LegacyTask:
+    def __init__(self, description, quote, deadline=None, completed=False, notes="", subtasks=None, priority="Medium"):
+        self.description = description
+        self.quote = quote
+        self.deadline = deadline
+        self.completed = completed
+        self.notes = notes
+        self.subtasks = subtasks if subtasks is not None else []
+        self.priority = priority
+
+
+def fresh(s):
+    return (s + " ")[:-1]
+
+
+def fields(i):
+    # Strings are rebuilt per task, as they are after loading from disk.
+    deadline = date(2026, 1, 1) + timedelta(days=i % 90)
+    subtasks = [("step %d" % i, False)] if i % 4 == 0 else []
+    return ("task %d" % i, fresh(quotes[i % len(quotes)]), deadline,
+            i % 3 == 0, "", subtasks, fresh(("High", "Medium", "Low")[i % 3]))
+
+
+def legacy(i):
+    desc, quote, deadline, completed, notes, subs, priority = fields(i)
+    return LegacyTask(desc, quote, date.fromordinal(deadline.toordinal()), completed, notes,
+                      [{'desc': d, 'completed': c} for d, c in subs], priority)
+
+
+def slotted(i):
+    desc, quote, deadline, completed, notes, subs, priority = fields(i)
+    return Task(desc, quote, date.fromordinal(deadline.toordinal()), completed, notes,
+                [Subtask(d, c) for d, c in subs], priority, id=i)
+
+
+def measure(make, count):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    items = [make(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del items
+    return used / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    before = measure(legacy, count)
+    after = measure(slotted, count)
+    print(f"{count} tasks")
+    print(f"dict-based Task: {before:7.1f} bytes/task")
+    print(f"slotted Task:    {after:7.1f} bytes/task ({100 * (1 - after / before):.0f}% smaller)")
@@ -0,0 +1,126 @@
+import bisect
+from datetime import date, datetime, time, timedelta
+
+# Tk's after() takes a C int of milliseconds; waking up hourly also copes
+# with suspend and clock changes.
+MAX_WAIT_MS = 3600 * 1000
+
+
+def merge_sorted(entries, new):
+    # Merges the sorted list new into the sorted list entries. Each new item
+    # costs one bisect; the runs between them are copied as slices, so a
+    # batch never re-sorts (or compares its way through) the whole list.
+    if not entries:
+        return new
+    out = []
+    lo = 0
+    for item in new:
+        pos = bisect.bisect_left(entries, item, lo)
+        out += entries[lo:pos]
+        out.append(item)
+        lo = pos
+    out += entries[lo:]
+    return out
+
+
+class DeadlineIndex:
+    # Pending tasks with a deadline, kept sorted as (deadline ordinal, id).
+    def __init__(self):
+        self._entries = []
+        self._ordinal = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set(self, task):
+        self.discard(task.id)
+        if task.deadline and not task.completed:
+            ordinal = task.deadline.toordinal()
+            bisect.insort(self._entries, (ordinal, task.id))
+            self._ordinal[task.id] = ordinal
+
+    def discard(self, task_id):
+        ordinal = self._ordinal.pop(task_id, None)
+        if ordinal is not None:
+            del self._entries[bisect.bisect_left(self._entries, (ordinal, task_id))]
+
+    def load(self, tasks):
+        # Only the new entries are sorted, then merged in.
+        new = []
+        for task in tasks:
+            if task.id in self._ordinal:
+                self.discard(task.id)
+            if task.deadline and not task.completed:
+                ordinal = task.deadline.toordinal()
+                new.append((ordinal, task.id))
+                self._ordinal[task.id] = ordinal
+        new.sort()
+        self._entries = merge_sorted(self._entries, new)
+
+    def between(self, start, end):
+        # Ids due on start..end inclusive, earliest first.
+        lo = bisect.bisect_left(self._entries, (start.toordinal(),))
+        hi = bisect.bisect_left(self._entries, (end.toordinal() + 1,))
+        return [task_id for _, task_id in self._entries[lo:hi]]
+
+    def upcoming(self, today, n):
+        lo = bisect.bisect_left(self._entries, (today.toordinal(),))
+        return [task_id for _, task_id in self._entries[lo:lo + n]]
+
+    def overdue(self, today, limit=None):
+        hi = bisect.bisect_left(self._entries, (today.toordinal(),))
+        if limit is not None:
+            hi = min(hi, limit)
+        return [task_id for _, task_id in self._entries[:hi]]
+
+    def count_overdue(self, today):
+        return bisect.bisect_left(self._entries, (today.toordinal(),))
+
+
+class DeadlineScheduler:
+    # Keeps a single root.after timer aimed at the next midnight on which a
+    # pending task passes its deadline, then reports just those task ids.
+    def __init__(self, root, store, on_overdue):
+        self.root = root
+        self.store = store
+        self.on_overdue = on_overdue
+        self.today = date.today()
+        self.timer = None
+        self.fires_on = None
+        store.subscribe(self.on_change)
+        self.arm()
+
+    def close(self):
+        self.store.unsubscribe(self.on_change)
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+
+    def on_change(self, op, task, changes):
+        # Only a deadline earlier than the armed one needs a new timer; if the
+        # armed task goes away the timer just fires early and re-arms.
+        if task is not None and task.deadline and not task.completed and (self.fires_on is None or task.deadline < self.fires_on):
+            self.arm()
+
+    def arm(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        upcoming = self.store.next_due(self.today, 1)
+        if not upcoming:
+            self.fires_on = None
+            return
+        self.fires_on = upcoming[0].deadline + timedelta(days=1)
+        wait = datetime.combine(self.fires_on, time.min) - datetime.now()
+        delay = max(0, min(int(wait.total_seconds() * 1000) + 1, MAX_WAIT_MS))
+        self.timer = self.root.after(delay, self.fire)
+
+    def fire(self):
+        self.timer = None
+        today = date.today()
+        if today > self.today:
+            ids = [t.id for t in self.store.due_between(self.today, today - timedelta(days=1))]
+            self.today = today
+            if ids:
+                self.on_overdue(ids)
+        self.arm()
@@ -0,0 +1,88 @@
+from collections import deque
+
+UNDO_LIMIT = 200
+
+
+class History:
+    # Undo/redo log for store mutations. Each entry keeps only what is needed
+    # to invert it: ("add" | "delete", task, key) or ("update", task_id, old,
+    # new, coalesce) holding just the fields that changed. Both stacks are
+    # bounded, so the oldest entries fall off once the limit is reached.
+    def __init__(self, store, limit=UNDO_LIMIT):
+        self.store = store
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = deque(maxlen=limit)
+        self.last = None
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.last = None
+
+    def _push(self, entry):
+        self.undo_stack.append(entry)
+        self.redo_stack.clear()
+        self.last = entry
+
+    def add(self, task, key=None):
+        task_id = self.store.add(task, key)
+        self._push(("add", task, self.store.order_key(task_id)))
+        return task_id
+
+    def delete(self, task_id):
+        task = self.store.get(task_id)
+        key = self.store.delete(task_id)
+        self._push(("delete", task, key))
+        return task
+
+    def update(self, task_id, coalesce=False, **changes):
+        task = self.store.get(task_id)
+        old = {name: getattr(task, name) for name in changes}
+        task = self.store.update(task_id, **changes)
+        new = {name: getattr(task, name) for name in changes}
+        # Repeated toggles of the same task fold into the entry just pushed,
+        # and drop out entirely once they are back where they started.
+        last = self.last
+        if (coalesce and last is not None and last[0] == "update" and last[1] == task_id
+                and last[4] and last[2].keys() == old.keys()):
+            self.undo_stack.pop()
+            old = last[2]
+        if old == new:
+            self.redo_stack.clear()
+            self.last = None
+        else:
+            self._push(("update", task_id, old, new, coalesce))
+        return task
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self._apply(entry, undo=True)
+        self.redo_stack.append(entry)
+        self.last = None
+        return entry
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self._apply(entry, undo=False)
+        self.undo_stack.append(entry)
+        self.last = None
+        return entry
+
+    def _apply(self, entry, undo):
+        op = entry[0]
+        if op == "update":
+            self.store.update(entry[1], **(entry[2] if undo else entry[3]))
+        elif (op == "add") == undo:
+            self.store.delete(entry[1].id)
+        else:
+            self.store.add(entry[1], key=entry[2])
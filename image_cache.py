@@ -0,0 +1,80 @@
+import glob
+import os
+import re
+import tkinter as tk
+from collections import OrderedDict
+from todo_core import DATA_DIR
+
+AVATAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "avatars")
+THUMB_DIR = os.path.join(DATA_DIR, "thumbnails")
+IMAGE_EXTS = (".png", ".gif", ".jpg", ".jpeg")
+
+
+def natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+class AvatarCache:
+    # Startup only lists the avatar files. Each one is decoded and resized the
+    # first time it is shown, and at most `limit` PhotoImages stay in memory.
+    # Resized copies are saved as PNGs in cache_dir, named after the source
+    # file's mtime, so later launches load them with tk.PhotoImage and never
+    # import PIL.
+    def __init__(self, root, folder=AVATAR_DIR, cache_dir=THUMB_DIR, size=46, limit=16):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.size = size
+        self.limit = limit
+        self.images = OrderedDict()
+        self.files = []
+        if os.path.isdir(folder):
+            names = [n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTS)]
+            self.files = [os.path.join(folder, n) for n in sorted(names, key=natural_key)]
+
+    def __len__(self):
+        return max(1, len(self.files))
+
+    def get(self, idx):
+        path = self.files[idx] if self.files else None
+        img = self.images.get(path)
+        if img is not None:
+            self.images.move_to_end(path)
+            return img
+        img = self.load(path)
+        self.images[path] = img
+        while len(self.images) > self.limit:
+            self.images.popitem(last=False)
+        return img
+
+    def load(self, path):
+        if path is None:
+            img = tk.PhotoImage(master=self.root, width=self.size, height=self.size)
+            img.put("#949494", to=(0, 0, self.size, self.size))
+            return img
+        thumb = self.thumb_path(path)
+        if os.path.isfile(thumb):
+            try:
+                return tk.PhotoImage(master=self.root, file=thumb)
+            except tk.TclError:
+                pass
+        from PIL import Image, ImageTk
+        img = Image.open(path).resize((self.size, self.size))
+        self.save_thumb(img, path, thumb)
+        return ImageTk.PhotoImage(img, master=self.root)
+
+    def thumb_path(self, path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{self.size}-{os.stat(path).st_mtime_ns}.png")
+
+    def save_thumb(self, img, path, thumb):
+        # A missing or read-only cache only costs a resize next launch.
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            for old in glob.glob(os.path.join(glob.escape(self.cache_dir), glob.escape(f"{stem}-{self.size}-") + "*.png")):
+                os.remove(old)
+            tmp = thumb + ".tmp"
+            img.save(tmp, "PNG")
+            os.replace(tmp, thumb)
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,150 @@
+import cProfile
+import functools
+import json
+import os
+import time
+import tkinter as tk
+from collections import deque
+
+# Latency percentiles are taken over the most recent WINDOW calls.
+WINDOW = 2048
+LAG_INTERVAL_MS = 100
+
+
+class Probe:
+    __slots__ = ("calls", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.samples = deque(maxlen=WINDOW)
+
+    def summary(self):
+        s = sorted(self.samples)
+
+        def ms(q):
+            return round(s[min(len(s) - 1, int(q * len(s)))] * 1000, 3) if s else 0.0
+        return {"calls": self.calls, "p50_ms": ms(0.5), "p95_ms": ms(0.95), "p99_ms": ms(0.99), "max_ms": ms(1.0)}
+
+
+class Instruments:
+    # Off unless enabled. While on, probed functions, every Tk callback and
+    # widget creation/destruction are counted and timed, and a heartbeat
+    # timer measures how late the event loop runs it. While off, a probe
+    # costs one attribute check per call.
+    def __init__(self):
+        self.enabled = False
+        self.installed = False
+        self.probes = {}
+        self.created = 0
+        self.destroyed = 0
+        self.lag = Probe()
+        self.root = None
+        self.lag_id = None
+        self.lag_due = None
+        self.profiler = None
+
+    def probe(self, fn):
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return wrapper
+
+    def record(self, name, seconds):
+        probe = self.probes.get(name)
+        if probe is None:
+            probe = self.probes.setdefault(name, Probe())
+        probe.calls += 1
+        probe.samples.append(seconds)
+
+    def install(self, root):
+        # Tk keeps a reference to each callback wrapper from the moment a
+        # widget or binding is created, so this has to run before the UI is built.
+        self.root = root
+        if self.installed:
+            return
+        self.installed = True
+        call, setup, destroy = tk.CallWrapper.__call__, tk.BaseWidget._setup, tk.BaseWidget.destroy
+
+        def timed_call(wrapper, *args):
+            if not self.enabled:
+                return call(wrapper, *args)
+            start = time.perf_counter()
+            try:
+                return call(wrapper, *args)
+            finally:
+                self.record("tk callback", time.perf_counter() - start)
+
+        def counted_setup(widget, master, cnf):
+            if self.enabled:
+                self.created += 1
+            return setup(widget, master, cnf)
+
+        def counted_destroy(widget):
+            if self.enabled:
+                self.destroyed += 1
+            return destroy(widget)
+        tk.CallWrapper.__call__ = timed_call
+        tk.BaseWidget._setup = counted_setup
+        tk.BaseWidget.destroy = counted_destroy
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled and self.lag_id is None and self.root is not None:
+            self.lag_due = None
+            self._tick()
+        elif not enabled and self.lag_id is not None:
+            self.root.after_cancel(self.lag_id)
+            self.lag_id = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self.lag_due is not None:
+            self.lag.calls += 1
+            self.lag.samples.append(max(0.0, now - self.lag_due))
+        self.lag_due = now + LAG_INTERVAL_MS / 1000
+        self.lag_id = self.root.after(LAG_INTERVAL_MS, self._tick)
+
+    def reset(self):
+        self.probes.clear()
+        self.lag = Probe()
+        self.lag_due = None
+        self.created = self.destroyed = 0
+
+    def snapshot(self):
+        return {
+            "probes": {name: p.summary() for name, p in sorted(self.probes.items())},
+            "event_loop_lag": self.lag.summary(),
+            "widgets": {"created": self.created, "destroyed": self.destroyed},
+        }
+
+    def dump(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, time.strftime("instrument-%Y%m%d-%H%M%S.json"))
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+    def toggle_profile(self, folder):
+        # Starts a cProfile capture, or stops it and returns the .prof path.
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            return None
+        self.profiler.disable()
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, time.strftime("profile-%Y%m%d-%H%M%S.prof"))
+        self.profiler.dump_stats(path)
+        self.profiler = None
+        return path
+
+
+instruments = Instruments()
+probe = instruments.probe
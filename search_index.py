@@ -0,0 +1,172 @@
+GRAM = 3
+MAX_POSTINGS = 4096
+
+
+def normalize(task):
+    # Fields are joined with a separator no query can contain, so a match
+    # never spans two fields (same as checking each field on its own).
+    parts = [task.description, task.notes] + [sub.desc for sub in task.subtasks]
+    return "\x00".join(p.lower() for p in parts)
+
+
+def trigrams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self._text = {}
+        self._stale = {}
+        self._seq = {}
+        self._grams = {}
+        self._completed = set()
+        self._pending = set()
+        self._next_seq = 0
+        self._last_query = None
+        self._last_result = None
+
+    def __len__(self):
+        return len(self._seq)
+
+    # Text is normalized lazily: add/update only mark the key stale and the
+    # next text query re-indexes whatever changed since the previous one.
+    def add(self, key, task, seq=None):
+        if seq is None:
+            seq = self._next_seq
+        self._next_seq = max(self._next_seq, seq + 1)
+        self._seq[key] = seq
+        self._stale[key] = task
+        self._set_status(key, task.completed)
+        return seq
+
+    def load(self, entries):
+        # Bulk add of (key, task, seq) triples.
+        for key, task, seq in entries:
+            self._seq[key] = seq
+            self._stale[key] = task
+            (self._completed if task.completed else self._pending).add(key)
+        if self._seq:
+            self._next_seq = max(self._next_seq, max(self._seq.values()) + 1)
+
+    def update(self, key, task):
+        self._stale[key] = task
+        self._set_status(key, task.completed)
+
+    def set_seq(self, key, seq):
+        self._seq[key] = seq
+        self._next_seq = max(self._next_seq, seq + 1)
+
+    def remove(self, key):
+        self._stale.pop(key, None)
+        self._unindex_text(key)
+        self._completed.discard(key)
+        self._pending.discard(key)
+        return self._seq.pop(key, None)
+
+    def search(self, query, status="All"):
+        return sorted(self.keys(query, status), key=self._seq.__getitem__)
+
+    def count(self, query, status="All"):
+        keys = self.keys(query, status)
+        if status == "Completed":
+            return len(keys), len(keys)
+        if status == "Pending":
+            return 0, len(keys)
+        if keys is self._seq:
+            return len(self._completed), len(keys)
+        return len(keys & self._completed), len(keys)
+
+    def keys(self, query, status="All"):
+        # Unordered matching keys; may be one of the index's own sets.
+        q = query.strip().lower()
+        if not q:
+            if status == "Completed":
+                keys = self._completed
+            elif status == "Pending":
+                keys = self._pending
+            else:
+                keys = self._seq
+        else:
+            keys = self._match(q)
+            if status == "Completed":
+                keys = keys & self._completed
+            elif status == "Pending":
+                keys = keys & self._pending
+        return keys
+
+    def _match(self, q):
+        if self._stale:
+            self._refresh()
+        if self._last_query is not None and self._last_query in q:
+            # The query only grew, so nothing outside the last result can match.
+            candidates = self._last_result
+        elif len(q) >= GRAM:
+            candidates = self._candidates(q)
+        else:
+            candidates = self._text
+        text = self._text
+        result = {k for k in candidates if q in text[k]}
+        self._last_query = q
+        self._last_result = result
+        return result
+
+    def _candidates(self, q):
+        postings = []
+        for gram in trigrams(q):
+            keys = self._posting(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    def _set_status(self, key, completed):
+        if completed:
+            self._pending.discard(key)
+            self._completed.add(key)
+        else:
+            self._completed.discard(key)
+            self._pending.add(key)
+
+    def _refresh(self):
+        for key, task in self._stale.items():
+            text = normalize(task)
+            if text != self._text.get(key):
+                self._unindex_text(key)
+                self._index_text(key, text)
+        self._stale.clear()
+
+    def _posting(self, gram):
+        # Posting lists are built the first time a trigram is queried (one
+        # scan) and then kept current by _index_text/_unindex_text; the
+        # least recently used ones are dropped past MAX_POSTINGS.
+        keys = self._grams.pop(gram, None)
+        if keys is None:
+            keys = {k for k, text in self._text.items() if gram in text}
+            if len(self._grams) >= MAX_POSTINGS:
+                del self._grams[next(iter(self._grams))]
+        self._grams[gram] = keys
+        return keys
+
+    def _index_text(self, key, text):
+        self._text[key] = text
+        if self._grams:
+            for gram in trigrams(text):
+                keys = self._grams.get(gram)
+                if keys is not None:
+                    keys.add(key)
+        self._last_query = None
+
+    def _unindex_text(self, key):
+        text = self._text.pop(key, None)
+        if text is not None and self._grams:
+            for gram in trigrams(text):
+                keys = self._grams.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+        self._last_query = None
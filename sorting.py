@@ -0,0 +1,84 @@
+import bisect
+from datetime import date
+from deadlines import merge_sorted
+from task_store import PRIORITIES
+
+SORT_MODES = ("Manual", "Deadline", "Priority", "Status", "Created")
+# The task field each sorted mode depends on; "Created" follows the id.
+# Ids are handed out in creation order within one process, but a list
+# shared through a sync server gets a block of ids per window, so there
+# "Created" orders the tasks by block first. Where the mode is offered,
+# that is said next to it (CREATED_NOTE).
+SORT_FIELDS = {"Deadline": "deadline", "Priority": "priority", "Status": "completed", "Created": None}
+CREATED_NOTE = ("Tasks added while a list is shared through a sync server are sorted "
+                "by the window they were added in first, then by when they were added.")
+NO_DEADLINE = date.max.toordinal() + 1
+_priority_codes = {p: i for i, p in enumerate(PRIORITIES)}
+
+
+def sort_key(mode, task):
+    # (group value, id): the id keeps ties in a stable order.
+    if mode == "Deadline":
+        return (task.deadline.toordinal() if task.deadline else NO_DEADLINE, task.id)
+    if mode == "Priority":
+        return (_priority_codes[task.priority], task.id)
+    if mode == "Status":
+        return (int(task.completed), task.id)
+    return (None, task.id)
+
+
+def group_label(mode, value, today=None):
+    if mode == "Deadline":
+        today = (today or date.today()).toordinal()
+        if value == NO_DEADLINE:
+            return "No deadline"
+        if value < today:
+            return "Earlier"
+        if value == today:
+            return "Today"
+        if value <= today + 7:
+            return "Next 7 days"
+        return "Later"
+    if mode == "Priority":
+        return f"{PRIORITIES[value]} priority"
+    if mode == "Status":
+        return "Completed" if value else "Pending"
+    return None
+
+
+class SortIndex:
+    # Task ids kept sorted by sort_key(mode, task), so an added or edited
+    # task is placed with one bisect instead of re-sorting the list.
+    def __init__(self, mode):
+        self.mode = mode
+        self.field = SORT_FIELDS[mode]
+        self.keys = []
+        self.key_of = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set(self, task):
+        self.discard(task.id)
+        key = sort_key(self.mode, task)
+        bisect.insort(self.keys, key)
+        self.key_of[task.id] = key
+
+    def discard(self, task_id):
+        key = self.key_of.pop(task_id, None)
+        if key is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def load(self, tasks):
+        # Only the new tasks are keyed and sorted, then merged in.
+        new = []
+        for task in tasks:
+            if task.id in self.key_of:
+                self.discard(task.id)
+            key = self.key_of[task.id] = sort_key(self.mode, task)
+            new.append(key)
+        new.sort()
+        self.keys = merge_sorted(self.keys, new)
+
+    def ids(self):
+        return [key[1] for key in self.keys]
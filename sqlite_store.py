@@ -0,0 +1,291 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from datetime import date
+from sorting import NO_DEADLINE
+from task_store import Task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    ord REAL NOT NULL,
+    description TEXT NOT NULL,
+    quote TEXT NOT NULL,
+    deadline TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    notes TEXT NOT NULL DEFAULT '',
+    subtasks TEXT NOT NULL DEFAULT '[]',
+    n_subtasks INTEGER NOT NULL DEFAULT 0,
+    priority TEXT NOT NULL DEFAULT 'Medium'
+);
+CREATE INDEX IF NOT EXISTS tasks_ord ON tasks(ord);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks(completed, ord);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks(priority, ord);
+CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks(completed, deadline);
+"""
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(description, notes, subtasks, tokenize='trigram')"
+# Used when this SQLite build has no FTS5 trigram tokenizer; searched with LIKE.
+TEXT_SCHEMA = "CREATE TABLE IF NOT EXISTS tasks_fts (rowid INTEGER PRIMARY KEY, description TEXT, notes TEXT, subtasks TEXT)"
+
+COLUMNS = "id, ord, description, quote, deadline, completed, notes, subtasks, priority"
+# Sort mode -> (group value, ORDER BY); ties always fall back to the id.
+SORTS = {
+    "Manual": ("NULL", "ord, id"),
+    "Deadline": ("deadline", "deadline IS NULL, deadline, id"),
+    "Priority": ("CASE priority WHEN 'High' THEN 0 WHEN 'Medium' THEN 1 ELSE 2 END",
+                 "CASE priority WHEN 'High' THEN 0 WHEN 'Medium' THEN 1 ELSE 2 END, id"),
+    "Status": ("completed", "completed, id"),
+    "Created": ("NULL", "id"),
+}
+CACHE_SIZE = 4096
+
+
+def task_from_row(row):
+    task_id, _, description, quote, deadline, completed, notes, subtasks, priority = row
+    return Task.restore(task_id, description, quote, deadline, bool(completed), notes, json.loads(subtasks), priority)
+
+
+def subtask_text(task):
+    return "\n".join(sub.desc for sub in task.subtasks)
+
+
+def subtasks_json(task):
+    return json.dumps([sub.to_dict() for sub in task.subtasks])
+
+
+def like_pattern(q):
+    return "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SqliteTaskStore:
+    # Same interface as TaskStore, but rows live in SQLite and filtering,
+    # counting and overdue checks are single indexed queries. Materialized
+    # tasks are kept in a small LRU so the visible rows do not hit the DB.
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        try:
+            self.db.execute(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.db.execute(TEXT_SCHEMA)
+            self.fts = False
+        self.db.commit()
+        self._cache = OrderedDict()
+        self._listeners = []
+
+    # Every mutation commits its own transaction, so the store doubles as its
+    # own storage object for the app's sync()/close() calls.
+    def sync(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __iter__(self):
+        for row in self.db.execute(f"SELECT {COLUMNS} FROM tasks ORDER BY ord, id"):
+            yield self._cached(row)
+
+    def __contains__(self, task_id):
+        return self.db.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+
+    def stat_rows(self):
+        # (id, completed, priority, subtasks, completed subtasks) per task;
+        # only rows that have subtasks decode their JSON.
+        for task_id, completed, priority, n_subtasks, subtasks in self.db.execute(
+                "SELECT id, completed, priority, n_subtasks, subtasks FROM tasks"):
+            done = sum(1 for d in json.loads(subtasks) if d.get("completed")) if n_subtasks else 0
+            yield task_id, bool(completed), priority, n_subtasks, done
+
+    def get(self, task_id):
+        task = self._cache.get(task_id)
+        if task is not None:
+            self._cache.move_to_end(task_id)
+            return task
+        row = self.db.execute(f"SELECT {COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            raise KeyError(task_id)
+        return self._cached(row)
+
+    def order_key(self, task_id):
+        row = self.db.execute("SELECT ord FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            raise KeyError(task_id)
+        return row[0]
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _emit(self, op, task, changes):
+        for listener in self._listeners:
+            listener(op, task, changes)
+
+    def _cached(self, row):
+        task = self._cache.get(row[0])
+        if task is None:
+            task = task_from_row(row)
+            self._cache[task.id] = task
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return task
+
+    def _insert(self, task, key):
+        cur = self.db.execute(
+            "INSERT INTO tasks (id, ord, description, quote, deadline, completed, notes, subtasks, n_subtasks, priority)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.id, key, task.description, task.quote,
+             task.deadline.isoformat() if task.deadline else None, int(task.completed),
+             task.notes, subtasks_json(task), len(task.subtasks), task.priority))
+        task.id = cur.lastrowid
+        self.db.execute("INSERT INTO tasks_fts (rowid, description, notes, subtasks) VALUES (?, ?, ?, ?)",
+                        (task.id, task.description, task.notes, subtask_text(task)))
+
+    def add(self, task, key=None):
+        with self.db:
+            if key is None:
+                key = self.db.execute("SELECT COALESCE(MAX(ord), 0) + 1.0 FROM tasks").fetchone()[0]
+            self._insert(task, key)
+        self._cache[task.id] = task
+        self._emit("add", task, {"key": key})
+        return task.id
+
+    def load(self, entries):
+        with self.db:
+            for key, task in entries:
+                self._insert(task, key)
+
+    def add_many(self, new_tasks):
+        entries = []
+        with self.db:
+            key = self.db.execute("SELECT COALESCE(MAX(ord), 0) FROM tasks").fetchone()[0]
+            for task in new_tasks:
+                key += 1.0
+                self._insert(task, key)
+                entries.append((key, task))
+        for key, task in entries:
+            self._emit("add", task, {"key": key})
+        return len(entries)
+
+    def update(self, task_id, **changes):
+        task = self.get(task_id)
+        for name, value in changes.items():
+            setattr(task, name, value)
+        with self.db:
+            self.db.execute(
+                "UPDATE tasks SET description = ?, quote = ?, deadline = ?, completed = ?, notes = ?,"
+                " subtasks = ?, n_subtasks = ?, priority = ? WHERE id = ?",
+                (task.description, task.quote, task.deadline.isoformat() if task.deadline else None,
+                 int(task.completed), task.notes, subtasks_json(task), len(task.subtasks),
+                 task.priority, task_id))
+            if changes.keys() & {"description", "notes", "subtasks"}:
+                self.db.execute("DELETE FROM tasks_fts WHERE rowid = ?", (task_id,))
+                self.db.execute("INSERT INTO tasks_fts (rowid, description, notes, subtasks) VALUES (?, ?, ?, ?)",
+                                (task_id, task.description, task.notes, subtask_text(task)))
+        self._emit("update", task, changes)
+        return task
+
+    def delete(self, task_id):
+        task = self.get(task_id)
+        key = self.order_key(task_id)
+        with self.db:
+            self.db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self.db.execute("DELETE FROM tasks_fts WHERE rowid = ?", (task_id,))
+        self._cache.pop(task_id, None)
+        self._emit("delete", task, {"key": key})
+        return key
+
+    def move(self, task_id, before_id=None, key=None):
+        task = self.get(task_id)
+        if key is None and before_id == task_id:
+            return self.order_key(task_id)
+        if key is None and before_id is None:
+            key = self.db.execute("SELECT COALESCE(MAX(ord), 0) + 1.0 FROM tasks WHERE id != ?", (task_id,)).fetchone()[0]
+        elif key is None:
+            upper = self.order_key(before_id)
+            lower = self.db.execute("SELECT COALESCE(MAX(ord), ? - 1.0) FROM tasks WHERE ord < ? AND id != ?",
+                                    (upper, upper, task_id)).fetchone()[0]
+            key = (lower + upper) / 2
+            if not lower < key < upper:
+                self.renumber()
+                key = self.order_key(before_id) - 0.5
+        with self.db:
+            self.db.execute("UPDATE tasks SET ord = ? WHERE id = ?", (key, task_id))
+        self._emit("move", task, {"key": key})
+        return key
+
+    def renumber(self, ids=None):
+        # Same contract as TaskStore.renumber: ids get keys by their place in
+        # the list, and ids that are not here are skipped by the UPDATE.
+        if ids is None:
+            ids = [r[0] for r in self.db.execute("SELECT id FROM tasks ORDER BY ord, id")]
+        with self.db:
+            self.db.executemany("UPDATE tasks SET ord = ? WHERE id = ?",
+                                [(float(n), task_id) for n, task_id in enumerate(ids, 1)])
+        self._emit("renumber", None, {"ids": ids})
+
+    def _where(self, query, status):
+        clauses, params = [], []
+        if status == "Completed":
+            clauses.append("completed = 1")
+        elif status == "Pending":
+            clauses.append("completed = 0")
+        q = query.strip()
+        if q and self.fts and len(q) >= 3:
+            clauses.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+            params.append('"' + q.replace('"', '""') + '"')
+        elif q:
+            clauses.append("id IN (SELECT rowid FROM tasks_fts WHERE description LIKE ? ESCAPE '\\'"
+                           " OR notes LIKE ? ESCAPE '\\' OR subtasks LIKE ? ESCAPE '\\')")
+            params += [like_pattern(q)] * 3
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def search(self, query, status="All", limit=None, offset=0, sort="Manual"):
+        where, params = self._where(query, status)
+        sql = f"SELECT {COLUMNS} FROM tasks{where} ORDER BY {SORTS[sort][1]} LIMIT ? OFFSET ?"
+        rows = self.db.execute(sql, params + [-1 if limit is None else limit, offset])
+        return [self._cached(row) for row in rows]
+
+    def search_entries(self, query, status="All", sort="Manual"):
+        # Same (id, subtask count, group value) entries as TaskStore.
+        where, params = self._where(query, status)
+        group, order = SORTS[sort]
+        rows = self.db.execute(f"SELECT id, n_subtasks, {group} FROM tasks{where} ORDER BY {order}", params)
+        if sort != "Deadline":
+            return rows.fetchall()
+        return [(task_id, n, date.fromisoformat(d).toordinal() if d else NO_DEADLINE) for task_id, n, d in rows]
+
+    def counts(self, query="", status="All"):
+        where, params = self._where(query, status)
+        total, completed = self.db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks{where}", params).fetchone()
+        return completed, total
+
+    def count_overdue(self, today):
+        return self.db.execute("SELECT COUNT(*) FROM tasks WHERE completed = 0 AND deadline < ?",
+                               (today.isoformat(),)).fetchone()[0]
+
+    def due_between(self, start, end):
+        rows = self.db.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE completed = 0 AND deadline BETWEEN ? AND ? ORDER BY deadline, id",
+            (start.isoformat(), end.isoformat()))
+        return [self._cached(row) for row in rows]
+
+    def next_due(self, today, n):
+        rows = self.db.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE completed = 0 AND deadline >= ? ORDER BY deadline, id LIMIT ?",
+            (today.isoformat(), n))
+        return [self._cached(row) for row in rows]
+
+    def overdue(self, today, limit=None):
+        rows = self.db.execute(
+            f"SELECT {COLUMNS} FROM tasks WHERE completed = 0 AND deadline < ? ORDER BY deadline, id LIMIT ?",
+            (today.isoformat(), -1 if limit is None else limit))
+        return [self._cached(row) for row in rows]
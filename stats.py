@@ -0,0 +1,153 @@
+import json
+import os
+from datetime import date, timedelta
+from task_store import PRIORITIES
+
+STATS_FILE = "stats.json"
+HISTORY_DAYS = 400
+_priority_codes = {p: i for i, p in enumerate(PRIORITIES)}
+
+
+def stats_path(data_dir):
+    return os.path.join(data_dir, STATS_FILE)
+
+
+# Each task's share of the counters is packed into one int so that removing
+# its old share on update needs no copy of the task:
+# bit 0 completed, bits 1-2 priority, then completed and total subtasks.
+def _pack(completed, priority, n_subtasks, n_done):
+    return int(completed) | _priority_codes[priority] << 1 | n_done << 3 | n_subtasks << 23
+
+
+def _unpack(v):
+    return v & 1, (v >> 1) & 3, v >> 23, (v >> 3) & 0xFFFFF
+
+
+class TaskStats:
+    # Running totals kept up to date from store events, so reading them never
+    # scans the tasks. Only construction walks the store once. Daily totals
+    # and completions are kept in a small history saved next to the data.
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path
+        self.total = 0
+        self.completed = 0
+        self.priority_total = [0] * len(PRIORITIES)
+        self.priority_completed = [0] * len(PRIORITIES)
+        self.subtasks = 0
+        self.subtasks_completed = 0
+        self._share = {}
+        self.days = {}
+        self.dirty = False
+        if path and os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                self.days = json.load(f).get("days", {})
+        for row in store.stat_rows():
+            self._add(row[0], _pack(*row[1:]))
+        self._touch(date.today())
+        store.subscribe(self.on_change)
+
+    def close(self):
+        self.store.unsubscribe(self.on_change)
+        self.save()
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    @property
+    def percent(self):
+        return int((self.completed / self.total) * 100) if self.total else 0
+
+    @property
+    def subtask_ratio(self):
+        return self.subtasks_completed / self.subtasks if self.subtasks else 0.0
+
+    def by_priority(self):
+        return {p: (self.priority_completed[i], self.priority_total[i]) for i, p in enumerate(PRIORITIES)}
+
+    def overdue(self, today=None):
+        return self.store.count_overdue(today or date.today())
+
+    def counts(self, status="All"):
+        # (completed, total) over all tasks with the given status.
+        if status == "Completed":
+            return self.completed, self.completed
+        if status == "Pending":
+            return 0, self.pending
+        return self.completed, self.total
+
+    def _apply(self, share, sign):
+        completed, priority, n_subtasks, n_done = _unpack(share)
+        self.total += sign
+        self.completed += sign * completed
+        self.priority_total[priority] += sign
+        self.priority_completed[priority] += sign * completed
+        self.subtasks += sign * n_subtasks
+        self.subtasks_completed += sign * n_done
+
+    def _add(self, task_id, share):
+        self._share[task_id] = share
+        self._apply(share, 1)
+
+    def _remove(self, task_id):
+        share = self._share.pop(task_id)
+        self._apply(share, -1)
+        return share
+
+    def on_change(self, op, task, changes):
+        if op == "add":
+            self._add(task.id, self._pack_task(task))
+        elif op == "delete":
+            self._remove(task.id)
+        elif op == "update" and changes.keys() & {"completed", "priority", "subtasks"}:
+            was_completed = self._remove(task.id) & 1
+            self._add(task.id, self._pack_task(task))
+            if task.completed != was_completed:
+                day = self.days.setdefault(date.today().isoformat(), {})
+                day["done"] = day.get("done", 0) + (1 if task.completed else -1)
+        else:
+            return
+        self._touch(date.today())
+
+    def _pack_task(self, task):
+        return _pack(task.completed, task.priority, len(task.subtasks), sum(s.completed for s in task.subtasks))
+
+    def _touch(self, today):
+        day = self.days.setdefault(today.isoformat(), {})
+        day["total"] = self.total
+        day["completed"] = self.completed
+        self.dirty = True
+
+    def completions(self, day):
+        # Net number of tasks marked completed on that day.
+        return self.days.get(day.isoformat(), {}).get("done", 0)
+
+    def trend(self, days=30, today=None):
+        # [(date, completed, total, completions)] for the last `days` days;
+        # days without activity carry the previous totals forward.
+        today = today or date.today()
+        start = today - timedelta(days=days - 1)
+        completed = total = 0
+        for key in sorted(k for k in self.days if k < start.isoformat()):
+            completed = self.days[key].get("completed", completed)
+            total = self.days[key].get("total", total)
+        out = []
+        for i in range(days):
+            day = start + timedelta(days=i)
+            rec = self.days.get(day.isoformat(), {})
+            completed = rec.get("completed", completed)
+            total = rec.get("total", total)
+            out.append((day, completed, total, rec.get("done", 0)))
+        return out
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        for key in sorted(self.days)[:-HISTORY_DAYS]:
+            del self.days[key]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"days": self.days}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,252 @@
+import gc
+import json
+import mmap
+import os
+from datetime import date
+from task_store import Subtask, Task
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT = "tasks.snapshot"
+JOURNAL = "tasks.journal"
+LOCK = "tasks.lock"
+
+
+class StoreLocked(OSError):
+    pass
+
+
+def lock_folder(folder):
+    # Returns the open lock file; the lock is held until it is closed, or
+    # until the process exits.
+    f = open(os.path.join(folder, LOCK), "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        raise StoreLocked(
+            f"The list in {folder} is already open in another window or command.\n"
+            "To use one list from several places at once, run it through a sync server "
+            "(python todo_cli.py serve) and start the app with TODO_SYNC set to its address.") from None
+    return f
+
+
+def encode_task(task):
+    return {
+        "id": task.id,
+        "description": task.description,
+        "quote": task.quote,
+        "deadline": task.deadline.isoformat() if task.deadline else None,
+        "completed": task.completed,
+        "notes": task.notes,
+        "subtasks": [sub.to_dict() for sub in task.subtasks],
+        "priority": task.priority,
+    }
+
+
+def decode_task(rec):
+    return Task(
+        rec["description"], rec["quote"],
+        deadline=date.fromisoformat(rec["deadline"]) if rec.get("deadline") else None,
+        completed=rec.get("completed", False),
+        notes=rec.get("notes", ""),
+        subtasks=[Subtask.from_dict(d) for d in rec.get("subtasks") or ()],
+        priority=rec.get("priority", "Medium"),
+        id=rec.get("id"),
+    )
+
+
+# Snapshot rows are positional to keep the file small and parsing fast.
+def snapshot_row(key, task):
+    return [key, task.id, task.description, task.quote,
+            task.deadline.isoformat() if task.deadline else None,
+            task.completed, task.notes, [sub.to_dict() for sub in task.subtasks], task.priority]
+
+
+def task_from_row(row):
+    # Rows are laid out as the arguments of Task.restore, after the key.
+    return row[0], Task.restore(*row[1:])
+
+
+def encode_changes(changes):
+    out = dict(changes)
+    if "deadline" in out:
+        out["deadline"] = out["deadline"].isoformat() if out["deadline"] else None
+    if "subtasks" in out:
+        out["subtasks"] = [sub.to_dict() for sub in out["subtasks"]]
+    return out
+
+
+def decode_changes(changes):
+    out = dict(changes)
+    if "deadline" in out:
+        out["deadline"] = date.fromisoformat(out["deadline"]) if out["deadline"] else None
+    if "subtasks" in out:
+        out["subtasks"] = [Subtask.from_dict(d) for d in out["subtasks"]]
+    return out
+
+
+# One change as a JSON-ready record; the journal and the sync protocol share
+# this format.
+def encode_record(op, task, changes):
+    if op == "add":
+        return {"op": op, "key": changes["key"], "task": encode_task(task)}
+    if op == "update":
+        return {"op": op, "id": task.id, "changes": encode_changes(changes)}
+    if op == "move":
+        return {"op": op, "id": task.id, "key": changes["key"]}
+    if op == "renumber":
+        return {"op": op, "ids": changes["ids"]}
+    return {"op": op, "id": task.id}
+
+
+def apply_record(store, rec):
+    # Records for a task that is already there (add) or already gone (the
+    # rest) are skipped, so replaying one twice is harmless.
+    op = rec["op"]
+    if op == "renumber":
+        # Journals written before renumbers carried their ids renumber
+        # the whole store, as it was then.
+        store.renumber(rec.get("ids"))
+    elif op == "add":
+        if rec["task"]["id"] not in store:
+            store.add(decode_task(rec["task"]), key=rec["key"])
+    elif rec["id"] not in store:
+        return
+    elif op == "update":
+        store.update(rec["id"], **decode_changes(rec["changes"]))
+    elif op == "move":
+        store.move(rec["id"], key=rec["key"])
+    elif op == "delete":
+        store.delete(rec["id"])
+
+
+class JournalStorage:
+    # Every store mutation is appended to the journal as one JSON line and
+    # fsynced in batches. Once the journal holds more than compact_every
+    # records and more records than the store has tasks (so bulk imports stay
+    # linear) the whole store is written to a snapshot and the journal restarts.
+    # Loading maps the snapshot and replays only journal records newer than it.
+    # Only one process may have a folder open at a time; open() raises
+    # StoreLocked if another one has.
+    def __init__(self, folder, batch_size=64, compact_every=5000):
+        self.folder = folder
+        self.snapshot_path = os.path.join(folder, SNAPSHOT)
+        self.journal_path = os.path.join(folder, JOURNAL)
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+        self.store = None
+        self.journal = None
+        self.lock = None
+        self.seq = 0
+        self.unsynced = 0
+        self.journal_records = 0
+        # Replaceable so the GUI can move the batched fsync off its thread.
+        self.fsync = os.fsync
+
+    def open(self, store):
+        os.makedirs(self.folder, exist_ok=True)
+        # Two writers would hand out the same seq numbers and task ids, and
+        # one's compaction would overwrite the other's tasks.
+        self.lock = lock_folder(self.folder)
+        self.store = store
+        # Loading allocates one container per row; pausing the cyclic GC
+        # avoids repeated full collections while they pile up.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.seq = self._load_snapshot(store)
+            good_end = self._replay_journal(store)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.journal = open(self.journal_path, "ab")
+        self.journal.truncate(good_end)
+        store.subscribe(self.record)
+
+    def close(self):
+        if self.journal is None:
+            return
+        self.store.unsubscribe(self.record)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.journal.close()
+        self.journal = None
+        self.lock.close()
+        self.lock = None
+
+    def record(self, op, task, changes):
+        self.seq += 1
+        rec = {"seq": self.seq, **encode_record(op, task, changes)}
+        self.journal.write(json.dumps(rec, separators=(",", ":")).encode() + b"\n")
+        self.unsynced += 1
+        self.journal_records += 1
+        if self.journal_records >= self.compact_every and self.journal_records >= len(self.store):
+            self.compact()
+        elif self.unsynced >= self.batch_size:
+            self.sync()
+
+    def sync(self):
+        if self.journal is None or not self.unsynced:
+            return
+        self.journal.flush()
+        self.unsynced = 0
+        self.fsync(self.journal.fileno())
+
+    def compact(self):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps({"seq": self.seq}).encode() + b"\n")
+            for task in self.store:
+                row = snapshot_row(self.store.order_key(task.id), task)
+                f.write(json.dumps(row, separators=(",", ":")).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Records up to self.seq are now in the snapshot; if we crash before
+        # the truncate below, loading skips them by sequence number.
+        self.journal.truncate(0)
+        self.journal.seek(0)
+        self.unsynced = 0
+        self.journal_records = 0
+
+    def _load_snapshot(self, store):
+        if not os.path.isfile(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return 0
+        with open(self.snapshot_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            seq = json.loads(mm.readline())["seq"]
+            body = mm[mm.tell():].rstrip(b"\n")
+        # JSON strings never contain a raw newline, so the rows can be parsed
+        # as one array in a single decoder call.
+        if body:
+            rows = json.loads(b"[" + body.replace(b"\n", b",") + b"]")
+            store.load(map(task_from_row, rows))
+        return seq
+
+    def _replay_journal(self, store):
+        if not os.path.isfile(self.journal_path):
+            return 0
+        good_end = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError(line)
+                    rec = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail; everything after it is dropped.
+                    break
+                good_end += len(line)
+                self.journal_records += 1
+                if rec["seq"] <= self.seq:
+                    continue
+                self.seq = rec["seq"]
+                apply_record(store, rec)
+        return good_end
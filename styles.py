@@ -0,0 +1,75 @@
+import tkinter.font as tkfont
+from tkinter import ttk
+
+FONT_SIZES = {
+    "Small": {'LARGE': 13, 'TASK': 10, 'NOTE': 9},
+    "Medium": {'LARGE': 16, 'TASK': 12, 'NOTE': 11},
+    "Large": {'LARGE': 20, 'TASK': 15, 'NOTE': 14},
+}
+THEMES = {
+    "Light": {
+        "BG": "#F7F6E7", "BTN": "#407BFF", "BTN_TEXT": "#FFFFFF", "FRAME": "#FFFFFF", "ENTRY": "#FFFFFF", "TEXT": "#111111"
+    },
+    "Dark": {
+        "BG": "#222939", "BTN": "#50A7FF", "BTN_TEXT": "#F3F3F3", "FRAME": "#31394D", "ENTRY": "#31394D", "TEXT": "#F3F3F3"
+    },
+    "High Contrast": {
+        "BG": "#000000", "BTN": "#FFFF00", "BTN_TEXT": "#000000", "FRAME": "#000000", "ENTRY": "#000000", "TEXT": "#FFFFFF"
+    }
+}
+PRIORITY_LOOKUP = {
+    'High': ('#e74c3c', 'HIGH'),
+    'Medium': ('#f39c12', 'MEDIUM'),
+    'Low': ('#27ae60', 'LOW'),
+}
+FONT_FAMILY = 'Helvetica'
+
+
+class StyleRegistry:
+    # Named fonts and ttk styles shared by every widget that uses them.
+    # Changing the font size or theme reconfigures this fixed set of objects
+    # and Tk redraws the widgets that refer to them, however many there are.
+    def __init__(self, root, theme="Light", size="Medium"):
+        self.root = root
+        self.style = ttk.Style(root)
+        self.fonts = {}
+        self.size = size
+        self.set_theme(theme)
+
+    def font(self, which, bold=False, italic=False):
+        key = (which, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = tkfont.Font(
+                self.root, family=FONT_FAMILY, size=FONT_SIZES[self.size][which],
+                weight='bold' if bold else 'normal', slant='italic' if italic else 'roman')
+        return font
+
+    def set_size(self, size):
+        self.size = size
+        for (which, _, _), font in self.fonts.items():
+            font.configure(size=FONT_SIZES[size][which])
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self.colors = colors = THEMES[theme]
+        hc = theme == "High Contrast"
+        bg, text = colors["BG"], colors["TEXT"]
+        configure = self.style.configure
+        configure("Row.TFrame", background=bg)
+        configure("Task.TCheckbutton", background=bg, foreground=text, font=self.font('TASK'))
+        configure("Done.Task.TCheckbutton", foreground='#999', font=self.font('TASK', bold=True))
+        configure("Overdue.Task.TCheckbutton", foreground='#FFFF00' if hc else '#aa0000')
+        configure("Sub.TCheckbutton", background=bg, foreground=text, font=self.font('NOTE', italic=True))
+        configure("Done.Sub.TCheckbutton", foreground='#FFFF00' if hc else '#25a625')
+        for name in ("Task.TCheckbutton", "Sub.TCheckbutton"):
+            self.style.map(name, background=[("active", bg)])
+        configure("Row.TLabel", background=bg, font=self.font('NOTE'))
+        configure("Header.Row.TLabel", foreground=text, font=self.font('TASK', bold=True))
+        configure("Deadline.Row.TLabel", foreground='#888888')
+        configure("Overdue.Deadline.Row.TLabel", foreground='#FFFF00' if hc else '#cc3333')
+        configure("Quote.Row.TLabel", foreground='#FFFF00' if hc else '#737373', font=self.font('NOTE', italic=True))
+        configure("Note.Row.TLabel", foreground='#FFFF00' if hc else '#555577')
+        for priority, (color, _) in PRIORITY_LOOKUP.items():
+            configure(f"{priority}.Priority.Row.TLabel", foreground=color, font=self.font('NOTE', bold=True))
+            configure(f"{priority}.Stripe.TFrame", background=color)
@@ -0,0 +1,372 @@
+# Sharing one task list between several app instances. A SyncServer owns the
+# store; clients mirror it in a local TaskStore, send their own changes as
+# journal-style records and get every change back in batches, in the order
+# the server applied them. Addresses are "host:port" for localhost TCP or a
+# filesystem path for a Unix socket.
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from storage import apply_record, decode_changes, decode_task, encode_record, encode_task, snapshot_row, task_from_row
+
+# Changes are collected for this long before a batch goes out.
+BATCH_MS = 20
+POLL_MS = 30
+# Longest a single poll may spend applying deltas before handing control
+# back to the Tk event loop.
+POLL_BUDGET = 0.02
+# Each client gets its own range of task ids, so tasks added on different
+# clients at the same time never collide.
+ID_BLOCK = 1 << 20
+# A client that falls this far behind is dropped rather than buffered.
+MAX_BACKLOG = 64 << 20
+LINE_LIMIT = 64 << 20
+
+
+def encode_line(msg):
+    return json.dumps(msg, separators=(",", ":")).encode() + b"\n"
+
+
+def connect(address, timeout=5):
+    if ":" in address:
+        host, port = address.rsplit(":", 1)
+        return socket.create_connection((host, int(port)), timeout=timeout)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(address)
+    return sock
+
+
+class SyncServer:
+    # Messages are one JSON object per line. A new client gets
+    #   {"type": "hello", "name", "seq", "ids": [start, end], "rows": [...]}
+    # with the whole list as snapshot rows, then
+    #   {"type": "deltas", "seq", "deltas": [record, ...]}
+    # for every batch. Clients send bare change records, or {"type": "ids"}
+    # to ask for their next id block. An add whose id the store already has
+    # is refused with {"type": "rejected", "record", "task", "key"} carrying
+    # the server's task; the client's later records for that id are dropped
+    # until it answers {"type": "resolved", "id"}.
+    def __init__(self, store, storage=None, name="Default", batch_ms=BATCH_MS):
+        self.store = store
+        self.storage = storage
+        self.name = name
+        self.batch_ms = batch_ms
+        self.seq = 0
+        self.pending = []
+        self.flush_handle = None
+        self.clients = set()
+        self.next_block = max((task.id for task in store), default=0) + 1
+        self.server = None
+        store.subscribe(self.on_change)
+
+    async def start(self, address):
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            self.server = await asyncio.start_server(self.handle, host, int(port), limit=LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, address, limit=LINE_LIMIT)
+        return self.server
+
+    async def serve(self, address):
+        # Runs until cancelled, syncing the storage once a second.
+        await self.start(address)
+        try:
+            while True:
+                await asyncio.sleep(1)
+                if self.storage is not None:
+                    self.storage.sync()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        self.flush()
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        await self.server.wait_closed()
+        self.store.unsubscribe(self.on_change)
+
+    def allocate(self):
+        block = [self.next_block, self.next_block + ID_BLOCK]
+        self.next_block += ID_BLOCK
+        return block
+
+    async def handle(self, reader, writer):
+        rows = [snapshot_row(self.store.order_key(task.id), task) for task in self.store]
+        writer.write(encode_line({"type": "hello", "name": self.name, "seq": self.seq,
+                                  "ids": self.allocate(), "rows": rows}))
+        self.clients.add(writer)
+        refused = set()
+        try:
+            await writer.drain()
+            async for line in reader:
+                msg = json.loads(line)
+                kind = msg.get("type")
+                if kind == "ids":
+                    writer.write(encode_line({"type": "ids", "ids": self.allocate()}))
+                    continue
+                if kind == "resolved":
+                    refused.discard(msg["id"])
+                    continue
+                if msg.get("op") == "add" and msg["task"]["id"] in self.store:
+                    self.refuse(writer, msg)
+                    refused.add(msg["task"]["id"])
+                    continue
+                if msg.get("id") in refused:
+                    # Refers to the client's copy of a refused task.
+                    continue
+                try:
+                    apply_record(self.store, msg)
+                except (KeyError, TypeError, ValueError) as exc:
+                    print(f"sync: dropped bad record {line[:200]!r}: {exc}", file=sys.stderr)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def refuse(self, writer, rec):
+        task_id = rec["task"]["id"]
+        print(f"sync: refused an add of task {task_id}; that id is already in use", file=sys.stderr)
+        writer.write(encode_line({"type": "rejected", "seq": self.seq, "record": rec,
+                                  "task": encode_task(self.store.get(task_id)),
+                                  "key": self.store.order_key(task_id)}))
+
+    def on_change(self, op, task, changes):
+        # Changes to the store, whoever made them, go out in the next batch.
+        self.seq += 1
+        self.pending.append(encode_record(op, task, changes))
+        if self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(self.batch_ms / 1000, self.flush)
+
+    def flush(self):
+        self.flush_handle = None
+        if not self.pending:
+            return
+        data = encode_line({"type": "deltas", "seq": self.seq, "deltas": self.pending})
+        self.pending = []
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                self.clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(data)
+
+
+def run_server(store, storage, address, name="Default"):
+    server = SyncServer(store, storage, name)
+    print(f"Serving {name!r} ({len(store):,} tasks) on {address}. Ctrl-C stops.")
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+class SyncClient:
+    # Stands in for the storage of a local TaskStore that mirrors a server.
+    # Local changes are applied straight away and sent in batches; deltas
+    # are read on a thread and applied by poll(), which reschedules itself
+    # with root.after when a root is given (headless callers call it
+    # themselves). Our own changes come back too and are applied again, so
+    # every client ends up in the server's order; applying one that is
+    # already in the store changes nothing. on_remote gets the
+    # (op, task id, changed fields) applied by each poll; on_lost is called
+    # once if the connection drops.
+    def __init__(self, store, address, root=None, on_remote=None, on_lost=None):
+        self.store = store
+        self.root = root
+        self.on_remote = on_remote
+        self.on_lost = on_lost
+        self.sock = connect(address)
+        self.file = self.sock.makefile("rb")
+        hello = json.loads(self.file.readline())
+        self.sock.settimeout(None)
+        self.name = hello["name"]
+        self.seq = hello["seq"]
+        store.load(map(task_from_row, hello["rows"]))
+        # [next id, end] of our block; the store asks new_id for each id.
+        self.ids = list(hello["ids"])
+        self.half = sum(self.ids) // 2
+        self.spare = None
+        self.spare_ready = threading.Event()
+        self.requested = False
+        store.id_source = self.new_id
+        self.incoming = queue.SimpleQueue()
+        self.outgoing = []
+        self.applying = False
+        self.connected = True
+        self.flush_id = None
+        self.poll_id = None
+        self.reader = threading.Thread(target=self.read, name="todo-sync", daemon=True)
+        self.reader.start()
+        store.subscribe(self.record)
+        if root is not None:
+            self.poll_id = root.after(POLL_MS, self.poll)
+
+    def read(self):
+        try:
+            for line in self.file:
+                msg = json.loads(line)
+                if msg["type"] == "ids":
+                    self.spare = msg["ids"]
+                    self.spare_ready.set()
+                else:
+                    self.incoming.put(msg)
+        except (OSError, ValueError):
+            pass
+        self.incoming.put(None)
+
+    def record(self, op, task, changes):
+        if self.applying or not self.connected:
+            return
+        self.outgoing.append(encode_line(encode_record(op, task, changes)))
+        if self.root is None:
+            return
+        if self.flush_id is None:
+            self.flush_id = self.root.after(BATCH_MS, self.flush)
+
+    def new_id(self):
+        # Called by the store before each new task, including every task of
+        # an add_many batch. The next block is asked for halfway through this
+        # one and switched to before an id past the end is handed out. If the
+        # server sends none, the connection counts as lost and ids carry on
+        # past the block, for this window's own copy only.
+        if self.ids[0] >= self.ids[1] and self.connected:
+            self.flush()
+            if self.spare_ready.wait(5):
+                self.ids, self.spare = list(self.spare), None
+                self.half = sum(self.ids) // 2
+                self.spare_ready.clear()
+                self.requested = False
+            else:
+                self.lost()
+        task_id = self.ids[0]
+        self.ids[0] += 1
+        if not self.requested and task_id >= self.half and self.connected:
+            self.requested = True
+            self.outgoing.append(encode_line({"type": "ids"}))
+        return task_id
+
+    def flush(self):
+        self.flush_id = None
+        if not self.outgoing or not self.connected:
+            return
+        data = b"".join(self.outgoing)
+        self.outgoing = []
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.lost()
+
+    def sync(self):
+        self.flush()
+
+    def poll(self, budget=POLL_BUDGET):
+        self.poll_id = None
+        applied = []
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline:
+            try:
+                msg = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            if msg is None:
+                self.lost()
+                break
+            self.seq = msg["seq"]
+            if msg["type"] == "rejected":
+                self.resolve(msg, applied)
+            else:
+                self.apply(msg["deltas"], applied)
+        if applied and self.on_remote is not None:
+            self.on_remote(applied)
+        if self.root is not None and self.connected:
+            self.poll_id = self.root.after(POLL_MS, self.poll)
+        return applied
+
+    def apply(self, deltas, applied):
+        store = self.store
+        self.applying = True
+        try:
+            for rec in deltas:
+                op = rec["op"]
+                if op == "renumber":
+                    # Tasks we have that the server did not renumber keep
+                    # their keys, so the order can change here.
+                    store.renumber(rec["ids"])
+                    applied.append((op, None, ()))
+                    continue
+                task_id = rec["task"]["id"] if op == "add" else rec["id"]
+                if op == "update" and task_id in store:
+                    # Fields that already match (usually our own echo) are
+                    # left alone, so nothing is redrawn for them.
+                    task = store.get(task_id)
+                    changes = {name: value for name, value in decode_changes(rec["changes"]).items()
+                               if getattr(task, name) != value}
+                    if not changes:
+                        continue
+                    store.update(task_id, **changes)
+                    applied.append((op, task_id, tuple(changes)))
+                elif (op == "add") != (task_id in store):
+                    apply_record(store, rec)
+                    applied.append((op, task_id, ()))
+        finally:
+            self.applying = False
+
+    def resolve(self, msg, applied):
+        # The server refused one of our adds because it already had a task
+        # with that id. Ours gives way to the server's copy and is added
+        # again under a new id.
+        store = self.store
+        task_id = msg["record"]["task"]["id"]
+        mine = key = None
+        self.applying = True
+        try:
+            if task_id in store:
+                if encode_task(store.get(task_id)) != msg["task"]:
+                    mine, key = store.get(task_id), store.order_key(task_id)
+                store.delete(task_id)
+            store.add(decode_task(msg["task"]), key=msg["key"])
+        finally:
+            self.applying = False
+        self.outgoing.append(encode_line({"type": "resolved", "id": task_id}))
+        # Reported as a delete too, so undo entries for the old id are dropped.
+        applied.append(("delete", task_id, ()))
+        applied.append(("add", task_id, ()))
+        if mine is not None:
+            mine.id = None
+            applied.append(("add", store.add(mine, key=key), ()))
+
+    def lost(self):
+        if not self.connected:
+            return
+        self.connected = False
+        if self.on_lost is None:
+            return
+        # This can happen in the middle of a store change (new_id), so with
+        # a root the callback waits until the event loop is idle.
+        if self.root is not None:
+            self.root.after_idle(self.on_lost)
+        else:
+            self.on_lost()
+
+    def close(self):
+        self.flush()
+        self.store.unsubscribe(self.record)
+        self.store.id_source = None
+        if self.root is not None:
+            for after_id in (self.poll_id, self.flush_id):
+                if after_id is not None:
+                    self.root.after_cancel(after_id)
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.reader.join(1)
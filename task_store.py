@@ -0,0 +1,411 @@
+import bisect
+import threading
+from datetime import date
+from itertools import islice
+from deadlines import DeadlineIndex
+from search_index import SearchIndex
+
+
+quotes = [
+    "Believe you can and you're halfway there.",
+    "Progress, not perfection.",
+    "Success is not for the lazy.",
+    "Each step forward is toward success."
+]
+PRIORITIES = ("High", "Medium", "Low")
+
+# Tasks hold small codes into these shared tables instead of their own
+# copies of the quote, priority and deadline objects.
+_quote_table = list(quotes)
+_quote_codes = {q: i for i, q in enumerate(_quote_table)}
+_priority_codes = {p: i for i, p in enumerate(PRIORITIES)}
+_dates = {}
+# ISO strings read from disk -> the shared date objects in _dates.
+_date_strings = {}
+# Tasks are also built on worker threads (imports); two new quotes interned
+# at once must not get the same code.
+_intern_lock = threading.Lock()
+
+
+def _intern_quote(quote):
+    with _intern_lock:
+        code = _quote_codes.get(quote)
+        if code is None:
+            _quote_table.append(quote)
+            code = _quote_codes[quote] = len(_quote_table) - 1
+    return code
+
+
+class Subtask:
+    __slots__ = ("desc", "completed")
+
+    def __init__(self, desc, completed=False):
+        self.desc = desc
+        self.completed = completed
+
+    def __eq__(self, other):
+        return isinstance(other, Subtask) and self.desc == other.desc and self.completed == other.completed
+
+    def to_dict(self):
+        return {"desc": self.desc, "completed": self.completed}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["desc"], d.get("completed", False))
+
+
+class Task:
+    __slots__ = ("description", "_quote", "_deadline", "completed", "notes", "_subtasks", "_priority", "id")
+
+    def __init__(self, description, quote, deadline=None, completed=False, notes="", subtasks=None, priority="Medium", id=None):
+        self.description = description
+        self.quote = quote
+        self.deadline = deadline
+        self.completed = completed
+        self.notes = notes
+        self.subtasks = subtasks
+        self.priority = priority
+        self.id = id
+
+    @classmethod
+    def restore(cls, task_id, description, quote, deadline, completed, notes, subtasks, priority):
+        # Fast path for tasks read back from disk: fills the slots directly
+        # and interns through plain dict lookups instead of the setters.
+        # deadline is an ISO string or None, subtasks a list of dicts.
+        task = cls.__new__(cls)
+        task.id = task_id
+        task.description = description
+        code = _quote_codes.get(quote)
+        if code is None:
+            code = _intern_quote(quote)
+        task._quote = code
+        if deadline:
+            day = _date_strings.get(deadline)
+            if day is None:
+                day = date.fromisoformat(deadline)
+                day = _date_strings[deadline] = _dates.setdefault(day, day)
+            task._deadline = day
+        else:
+            task._deadline = None
+        task.completed = completed
+        task.notes = notes
+        task._subtasks = tuple([Subtask(d["desc"], d.get("completed", False)) for d in subtasks]) if subtasks else ()
+        task._priority = _priority_codes[priority]
+        return task
+
+    @property
+    def quote(self):
+        return _quote_table[self._quote]
+
+    @quote.setter
+    def quote(self, value):
+        code = _quote_codes.get(value)
+        if code is None:
+            code = _intern_quote(value)
+        self._quote = code
+
+    @property
+    def priority(self):
+        return PRIORITIES[self._priority]
+
+    @priority.setter
+    def priority(self, value):
+        try:
+            self._priority = _priority_codes[value]
+        except KeyError:
+            raise ValueError(f"unknown priority {value!r}") from None
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, value):
+        self._deadline = None if value is None else _dates.setdefault(value, value)
+
+    # Subtasks are stored as a tuple (the empty one is shared); callers
+    # replace the whole sequence rather than mutating it in place.
+    @property
+    def subtasks(self):
+        return self._subtasks
+
+    @subtasks.setter
+    def subtasks(self, value):
+        self._subtasks = tuple(value) if value else ()
+
+
+class TaskStore:
+    # Tasks keyed by a stable id, ordered by a float key kept in a sorted
+    # list. Deletes only drop the id from _key_of; stale entries in the
+    # sorted list are skipped while iterating and purged in bulk later.
+    def __init__(self):
+        self._tasks = {}
+        self._key_of = {}
+        self._keys = []
+        self._ids = []
+        self._dead = 0
+        self._next_id = 1
+        # Optional callable giving the id of each new task; a sync client
+        # hands out ids from the block the server gave it.
+        self.id_source = None
+        self._listeners = []
+        self.index = SearchIndex()
+        self.deadlines = DeadlineIndex()
+        # Sorted views by deadline, priority, etc., built on first use.
+        self.sorts = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        key_of = self._key_of
+        for key, task_id in zip(self._keys, self._ids):
+            if key_of.get(task_id) == key:
+                yield self._tasks[task_id]
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def stat_rows(self):
+        # (id, completed, priority, subtasks, completed subtasks) per task.
+        for task in self._tasks.values():
+            yield task.id, task.completed, task.priority, len(task.subtasks), sum(s.completed for s in task.subtasks)
+
+    def get(self, task_id):
+        return self._tasks[task_id]
+
+    def order_key(self, task_id):
+        return self._key_of[task_id]
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _emit(self, op, task, changes):
+        for listener in self._listeners:
+            listener(op, task, changes)
+
+    def add(self, task, key=None):
+        if task.id is None:
+            task.id = self._new_id()
+        self._next_id = max(self._next_id, task.id + 1)
+        if key is None:
+            key = self._keys[-1] + 1.0 if self._keys else 1.0
+        self._place(task.id, key)
+        self._tasks[task.id] = task
+        self.index.add(task.id, task, seq=key)
+        self.deadlines.set(task)
+        for index in self.sorts.values():
+            index.set(task)
+        self._emit("add", task, {"key": key})
+        return task.id
+
+    def load(self, entries):
+        # Bulk insert of (key, task) pairs sorted by key; emits no events.
+        entries = list(entries)
+        if not entries:
+            return
+        if self._keys and entries[0][0] <= self._keys[-1]:
+            for key, task in entries:
+                self._place(task.id, key)
+        else:
+            self._keys.extend(key for key, _ in entries)
+            self._ids.extend(task.id for _, task in entries)
+            self._key_of.update((task.id, key) for key, task in entries)
+        self._tasks.update((task.id, task) for _, task in entries)
+        self.index.load((task.id, task, key) for key, task in entries)
+        self.deadlines.load(task for _, task in entries)
+        for index in self.sorts.values():
+            index.load(task for _, task in entries)
+        self._next_id = max(self._next_id, max(task.id for _, task in entries) + 1)
+
+    def _new_id(self):
+        if self.id_source is not None:
+            return self.id_source()
+        task_id = self._next_id
+        self._next_id += 1
+        return task_id
+
+    def add_many(self, new_tasks):
+        # Appends a batch in one pass; listeners still see one "add" per task.
+        key = self._keys[-1] if self._keys else 0.0
+        entries = []
+        for task in new_tasks:
+            key += 1.0
+            if task.id is None:
+                task.id = self._new_id()
+            entries.append((key, task))
+        self.load(entries)
+        for key, task in entries:
+            self._emit("add", task, {"key": key})
+        return len(entries)
+
+    def update(self, task_id, **changes):
+        task = self._tasks[task_id]
+        for name, value in changes.items():
+            setattr(task, name, value)
+        self.index.update(task_id, task)
+        if "deadline" in changes or "completed" in changes:
+            self.deadlines.set(task)
+        for index in self.sorts.values():
+            if index.field in changes:
+                index.set(task)
+        self._emit("update", task, changes)
+        return task
+
+    def delete(self, task_id):
+        task = self._tasks.pop(task_id)
+        key = self._key_of.pop(task_id)
+        self._dead += 1
+        self.index.remove(task_id)
+        self.deadlines.discard(task_id)
+        for index in self.sorts.values():
+            index.discard(task_id)
+        self._emit("delete", task, {"key": key})
+        self._maybe_compact()
+        return key
+
+    def move(self, task_id, before_id=None, key=None):
+        # Places task_id just before before_id (or at the end when None);
+        # an explicit key is used as-is, e.g. when replaying a journal.
+        task = self._tasks[task_id]
+        if key is None and before_id is not None:
+            # Checked before any state changes, so a bad before_id leaves the
+            # store as it was.
+            if before_id == task_id:
+                return self._key_of[task_id]
+            if before_id not in self._tasks:
+                raise KeyError(before_id)
+        # The new key is worked out with the task still in place, so a
+        # renumber here covers the same tasks as one replayed from the journal.
+        if key is None and before_id is None:
+            key = self._last_key() + 1.0
+        elif key is None:
+            upper = self._key_of[before_id]
+            lower = self._prev_key(upper)
+            key = (lower + upper) / 2
+            if not lower < key < upper:
+                self.renumber()
+                key = self._key_of[before_id] - 0.5
+        del self._key_of[task_id]
+        self._dead += 1
+        self._place(task_id, key)
+        self.index.set_seq(task_id, key)
+        self._emit("move", task, {"key": key})
+        self._maybe_compact()
+        return key
+
+    def search(self, query, status="All", limit=None, offset=0, sort="Manual"):
+        stop = None if limit is None else offset + limit
+        if sort != "Manual":
+            return [self._tasks[i] for i in self._sorted_ids(query, status, sort)[offset:stop]]
+        if status == "All" and not query.strip():
+            return list(islice(self, offset, stop))
+        return [self._tasks[i] for i in self.index.search(query, status)[offset:stop]]
+
+    def search_entries(self, query, status="All", sort="Manual"):
+        # (id, subtask count, group value) in display order; the group value
+        # is the first part of the sort key, None in manual order.
+        if sort == "Manual":
+            return [(t.id, len(t.subtasks), None) for t in self.search(query, status)]
+        key_of = self._sort_index(sort).key_of
+        tasks = self._tasks
+        return [(i, len(tasks[i].subtasks), key_of[i][0]) for i in self._sorted_ids(query, status, sort)]
+
+    def _sort_index(self, mode):
+        index = self.sorts.get(mode)
+        if index is None:
+            from sorting import SortIndex  # sorting imports this module
+            index = self.sorts[mode] = SortIndex(mode)
+            index.load(self._tasks.values())
+        return index
+
+    def _sorted_ids(self, query, status, sort):
+        index = self._sort_index(sort)
+        if status == "All" and not query.strip():
+            return index.ids()
+        keys = self.index.keys(query, status)
+        # A few matches are cheaper to sort than the whole index is to walk.
+        if len(keys) * 16 < len(index):
+            return sorted(keys, key=index.key_of.__getitem__)
+        return [i for i in index.ids() if i in keys]
+
+    def counts(self, query="", status="All"):
+        return self.index.count(query, status)
+
+    def overdue(self, today, limit=None):
+        return [self._tasks[i] for i in self.deadlines.overdue(today, limit)]
+
+    def count_overdue(self, today):
+        return self.deadlines.count_overdue(today)
+
+    def due_between(self, start, end):
+        return [self._tasks[i] for i in self.deadlines.between(start, end)]
+
+    def next_due(self, today, n):
+        return [self._tasks[i] for i in self.deadlines.upcoming(today, n)]
+
+    def _place(self, task_id, key):
+        pos = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key, pos)
+        self._key_of[task_id] = key
+        # Re-adding a deleted task at its old key revives its old entry.
+        if task_id in self._ids[pos:end]:
+            self._dead -= 1
+            return
+        # Equal keys (tasks added on two sync clients at once) are kept in id
+        # order, so every copy of the store orders them the same way.
+        while end > pos and self._ids[end - 1] > task_id:
+            end -= 1
+        self._keys.insert(end, key)
+        self._ids.insert(end, task_id)
+
+    def _live_entries(self):
+        key_of = self._key_of
+        return [(k, i) for k, i in zip(self._keys, self._ids) if key_of.get(i) == k]
+
+    def _last_key(self):
+        for pos in range(len(self._keys) - 1, -1, -1):
+            if self._key_of.get(self._ids[pos]) == self._keys[pos]:
+                return self._keys[pos]
+        return 0.0
+
+    def _prev_key(self, key):
+        pos = bisect.bisect_left(self._keys, key) - 1
+        while pos >= 0:
+            if self._key_of.get(self._ids[pos]) == self._keys[pos] and self._keys[pos] < key:
+                return self._keys[pos]
+            pos -= 1
+        return key - 1.0
+
+    def _maybe_compact(self):
+        if self._dead > 64 and self._dead > len(self._tasks):
+            self._compact()
+
+    def _compact(self):
+        live = self._live_entries()
+        self._keys = [k for k, _ in live]
+        self._ids = [i for _, i in live]
+        self._dead = 0
+
+    def renumber(self, ids=None):
+        # Gives the tasks keys 1, 2, 3... in their current order, or the
+        # tasks in ids keys 1, 2, 3... by their place in that list. The
+        # event (task None) carries the ids, so a journal or another sync
+        # client that applies it sets exactly the same keys, even when its
+        # own tasks differ; ids it does not have are skipped and tasks not
+        # in the list keep their keys.
+        if ids is None:
+            ids = [i for _, i in self._live_entries()]
+        key_of = self._key_of
+        for n, task_id in enumerate(ids, 1):
+            if task_id in key_of:
+                key_of[task_id] = float(n)
+                self.index.set_seq(task_id, float(n))
+        live = sorted((key, task_id) for task_id, key in key_of.items())
+        self._keys = [k for k, _ in live]
+        self._ids = [i for _, i in live]
+        self._dead = 0
+        self._emit("renumber", None, {"ids": ids})
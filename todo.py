@@ -1,72 +1,446 @@
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import filedialog
+from tkinter import simpledialog
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
 from datetime import date
 import random
-from PIL import Image, ImageTk
 import os
+import math
+import base64
+import io
+import threading
+import time
+from deadlines import DeadlineScheduler
+from history import History
+from image_cache import AvatarCache
+from instrument import instruments, probe
+from sorting import CREATED_NOTE, SORT_FIELDS, SORT_MODES, group_label
+from stats import TaskStats, stats_path
+from storage import StoreLocked
+from styles import FONT_SIZES, PRIORITY_LOOKUP, StyleRegistry
+from workers import WorkerPool
+from workspaces import Workspace
+from todo_core import DATA_DIR, Subtask, Task, TaskStore, badge_for, filter_tasks, quotes
 
-quotes = [
-    "Believe you can and you're halfway there.",
-    "Progress, not perfection.",
-    "Success is not for the lazy.",
-    "Each step forward is toward success."
-]
-
-FONT_SIZES = {
-    "Small": {'LARGE': 13, 'TASK': 10, 'NOTE': 9},
-    "Medium": {'LARGE': 16, 'TASK': 12, 'NOTE': 11},
-    "Large": {'LARGE': 20, 'TASK': 15, 'NOTE': 14},
-}
-THEMES = {
-    "Light": {
-        "BG": "#F7F6E7", "BTN": "#407BFF", "BTN_TEXT": "#FFFFFF", "FRAME": "#FFFFFF", "ENTRY": "#FFFFFF", "TEXT": "#111111"
-    },
-    "Dark": {
-        "BG": "#222939", "BTN": "#50A7FF", "BTN_TEXT": "#F3F3F3", "FRAME": "#31394D", "ENTRY": "#31394D", "TEXT": "#F3F3F3"
-    },
-    "High Contrast": {
-        "BG": "#000000", "BTN": "#FFFF00", "BTN_TEXT": "#000000", "FRAME": "#000000", "ENTRY": "#000000", "TEXT": "#FFFFFF"
-    }
-}
-PRIORITY_LOOKUP = {
-    'High': ('#e74c3c', 'HIGH'),
-    'Medium': ('#f39c12', 'MEDIUM'),
-    'Low': ('#27ae60', 'LOW'),
-}
-
-class Task:
-    def __init__(self, description, quote, deadline=None, completed=False, notes="", subtasks=None, priority="Medium"):
-        self.description = description
-        self.quote = quote
-        self.deadline = deadline
-        self.completed = completed
-        self.notes = notes
-        self.subtasks = subtasks if subtasks is not None else []
-        self.priority = priority
-
-tasks = []
+tasks = TaskStore()
+
+ROW_HEIGHTS = {"Small": 28, "Medium": 32, "Large": 38}
+SEARCH_DEBOUNCE_MS = 150
+DATA_REGIONS = ("list", "progress", "achievements", "chart")
+
+class TaskRow:
+    # Colors and fonts come from the shared ttk styles, so a row is only
+    # reconfigured when its task changes, never for a theme or font switch.
+    kind = "task"
+
+    def __init__(self, view):
+        self.view = view
+        app = view.app
+        self.task = None
+        self.sig = None
+        self.y = None
+        self.frame = ttk.Frame(view.viewport, style="Row.TFrame", padding=(0, 2))
+        self.stripe = ttk.Frame(self.frame, width=5)
+        self.stripe.pack(side="left", fill="y")
+        self.var = tk.BooleanVar()
+        self.cb = ttk.Checkbutton(self.frame, variable=self.var, command=lambda: app.toggle_task(self.task.id))
+        self.cb.pack(side="left")
+        self.pri_label = ttk.Label(self.frame, padding=(3, 0))
+        self.pri_label.pack(side="left")
+        self.deadline_lbl = ttk.Label(self.frame)
+        self.deadline_lbl.pack(side="left", padx=2)
+        self.quote_lbl = ttk.Label(self.frame, style="Quote.Row.TLabel")
+        self.quote_lbl.pack(side="left", padx=6)
+        self.edit_btn = tk.Button(self.frame, text="Edit", bg='#FFA500', fg='white', font=app.get_font('NOTE'),
+                                  command=lambda: app.edit_task(self.task.id))
+        self.edit_btn.pack(side="right", padx=1)
+        self.del_btn = tk.Button(self.frame, text="Delete", bg='#FF4444', fg='white', font=app.get_font('NOTE'),
+                                 command=lambda: app.delete_task(self.task.id))
+        self.del_btn.pack(side="right", padx=1)
+        self.note_lbl = ttk.Label(self.frame, style="Note.Row.TLabel")
+        view.bind_wheel(self.frame, self.stripe, self.cb, self.pri_label, self.deadline_lbl,
+                        self.quote_lbl, self.edit_btn, self.del_btn, self.note_lbl)
+
+    def show(self, task, sub_idx, today):
+        overdue = bool(not task.completed and task.deadline and task.deadline < today)
+        sig = (task.description, task.completed, task.priority, task.deadline, task.quote, task.notes, overdue)
+        self.task = task
+        if sig == self.sig:
+            return
+        self.sig = sig
+        label = PRIORITY_LOOKUP[task.priority][1]
+        self.stripe.config(style=f"{task.priority}.Stripe.TFrame")
+        self.var.set(task.completed)
+        self.cb.config(text=task.description,
+                       style="Done.Task.TCheckbutton" if task.completed else
+                       "Overdue.Task.TCheckbutton" if overdue else "Task.TCheckbutton")
+        self.pri_label.config(text=f"[{label}]", style=f"{task.priority}.Priority.Row.TLabel")
+        deadline_text = f" (Due: {task.deadline.strftime('%Y-%m-%d')})" if task.deadline else ""
+        self.deadline_lbl.config(text=deadline_text,
+                                 style="Overdue.Deadline.Row.TLabel" if overdue else "Deadline.Row.TLabel")
+        self.quote_lbl.config(text=f"“{task.quote}”")
+        if task.notes.strip():
+            notes_preview = task.notes.replace("\n", " ").strip()[:24]
+            if len(task.notes) > 24:
+                notes_preview += "…"
+            self.note_lbl.config(text=f"🗒 {notes_preview}")
+            if not self.note_lbl.winfo_manager():
+                self.note_lbl.pack(side="left", padx=7)
+        else:
+            self.note_lbl.pack_forget()
+
+class SubtaskRow:
+    kind = "sub"
+
+    def __init__(self, view):
+        self.view = view
+        app = view.app
+        self.task = None
+        self.sub_idx = None
+        self.sig = None
+        self.y = None
+        self.frame = ttk.Frame(view.viewport, style="Row.TFrame")
+        self.var = tk.BooleanVar()
+        self.cb = ttk.Checkbutton(self.frame, variable=self.var,
+                                  command=lambda: app.toggle_subtask(self.task.id, self.sub_idx))
+        self.cb.pack(side="left", anchor="w")
+        self.del_btn = tk.Button(self.frame, text="Delete", bg='#DD3333', fg='white', font=app.get_font('NOTE'),
+                                 command=lambda: app.delete_subtask(self.task.id, self.sub_idx))
+        self.del_btn.pack(side="left", padx=5)
+        view.bind_wheel(self.frame, self.cb, self.del_btn)
+
+    def show(self, task, sub_idx, today):
+        self.task = task
+        self.sub_idx = sub_idx
+        if sub_idx >= len(task.subtasks):
+            # The row list is behind a subtask delete; stay hidden until the
+            # list is rebuilt.
+            self.frame.place_forget()
+            self.y = None
+            return False
+        sub = task.subtasks[sub_idx]
+        sig = (sub.desc, sub.completed)
+        if sig == self.sig:
+            return
+        self.sig = sig
+        self.var.set(sub.completed)
+        self.cb.config(text=sub.desc, style="Done.Sub.TCheckbutton" if sub.completed else "Sub.TCheckbutton")
+
+class HeaderRow:
+    # Group title shown above each run of tasks in a sorted view.
+    kind = "header"
+
+    def __init__(self, view):
+        self.view = view
+        self.label = None
+        self.y = None
+        self.frame = ttk.Frame(view.viewport, style="Row.TFrame")
+        self.text = ttk.Label(self.frame, style="Header.Row.TLabel")
+        self.text.pack(side="left", padx=4, anchor="s")
+        view.bind_wheel(self.frame, self.text)
+
+    def show(self, task, label, today):
+        if label != self.label:
+            self.label = label
+            self.text.config(text=label)
+
+class TaskListView:
+    # Only rows inside the viewport get widgets; they are pooled and reused as
+    # the list scrolls or changes, keyed by (task id, subtask index). Tasks
+    # are fetched from the store only for the visible rows.
+    def __init__(self, app, parent, width=720, height=360):
+        self.app = app
+        self.viewport = tk.Frame(parent, bg=app.colors["BG"], width=width, height=height)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.rows = []
+        self.offset = 0
+        self.active = {}
+        self.pool = {"task": [], "sub": [], "header": []}
+        self.viewport.bind("<Configure>", lambda e: self.render())
+        self.bind_wheel(self.viewport)
+
+    def bind_wheel(self, *widgets):
+        for w in widgets:
+            w.bind("<MouseWheel>", self.on_wheel)
+            w.bind("<Button-4>", lambda e: self.scroll_by(-1))
+            w.bind("<Button-5>", lambda e: self.scroll_by(1))
+
+    def row_height(self):
+        return ROW_HEIGHTS[self.app.font_var.get()]
+
+    def viewport_height(self):
+        h = self.viewport.winfo_height()
+        return h if h > 1 else int(self.viewport.cget("height"))
+
+    def set_entries(self, entries, sort="Manual"):
+        # Header rows are keyed (None, label); a label only starts a group once.
+        rows = []
+        today = date.today()
+        label = None
+        for task_id, n_subtasks, group in entries:
+            if sort not in ("Manual", "Created"):
+                new_label = group_label(sort, group, today)
+                if new_label != label:
+                    label = new_label
+                    rows.append((None, label))
+            rows.append((task_id, None))
+            for j in range(n_subtasks):
+                rows.append((task_id, j))
+        self.rows = rows
+        self.render()
+
+    def max_offset(self):
+        return max(0, len(self.rows) * self.row_height() - self.viewport_height())
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.rows) * self.row_height())
+        elif unit == "pages":
+            self.offset += int(amount) * self.viewport_height()
+        else:
+            self.offset += int(amount) * self.row_height()
+        self.render()
+
+    def on_wheel(self, event):
+        self.scroll_by(-1 if event.delta > 0 else 1)
+
+    def scroll_by(self, units):
+        self.offset += units * 3 * self.row_height()
+        self.render()
+
+    def render(self):
+        rh = self.row_height()
+        height = self.viewport_height()
+        self.offset = min(max(self.offset, 0), self.max_offset())
+        first = self.offset // rh
+        last = min(len(self.rows), (self.offset + height) // rh + 1)
+        visible = {self.rows[i]: i for i in range(first, last)}
+        for key in [k for k in self.active if k not in visible]:
+            row = self.active.pop(key)
+            row.frame.place_forget()
+            row.y = None
+            self.pool[row.kind].append(row)
+        today = date.today()
+        for key, i in visible.items():
+            row = self.active.get(key)
+            if row is None:
+                kind = "header" if key[0] is None else "task" if key[1] is None else "sub"
+                if self.pool[kind]:
+                    row = self.pool[kind].pop()
+                else:
+                    row = {"header": HeaderRow, "task": TaskRow, "sub": SubtaskRow}[kind](self)
+                self.active[key] = row
+            if row.show(None if key[0] is None else tasks.get(key[0]), key[1], today) is False:
+                continue
+            y = i * rh - self.offset
+            if row.y != y:
+                indent = 30 if row.kind == "sub" else 0
+                row.frame.place(x=indent, y=y, relwidth=1, width=-indent, height=rh)
+                row.y = y
+        total = len(self.rows) * rh
+        if total > height:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def relayout(self):
+        for row in self.active.values():
+            row.y = None
+        self.render()
+
+    def refresh_tasks(self, task_ids):
+        # Re-show just the on-screen rows of these tasks; rows scrolled out of
+        # view pick up the change when they are shown again.
+        task_ids = set(task_ids)
+        today = date.today()
+        for key, row in self.active.items():
+            if key[0] in task_ids:
+                row.show(tasks.get(key[0]), key[1], today)
+
+class CompletionChart:
+    # One figure for the whole session, drawn with Agg on a worker thread into
+    # a PNG that a plain Label shows. Wedges are updated in place, bursts of
+    # updates are folded into one job on the next idle tick, and a newer job
+    # supersedes a render that has not finished. matplotlib is imported by
+    # the first render, off the UI thread.
+    LABELS = ["Completed", "Pending"]
+    COLORS = ["#81C784", "#FFF176"]
+
+    def __init__(self, root, parent, workers):
+        self.root = root
+        self.workers = workers
+        self.label = tk.Label(parent, bd=0, bg=parent.cget("bg"))
+        self.label.pack()
+        self.image = None
+        self.fig = None
+        self.lock = threading.Lock()
+        self.counts = None
+        self.next_counts = None
+        self.after_id = None
+
+    def build(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.fig = Figure(figsize=(2.4,2), dpi=100)
+        self.fig.patch.set_alpha(0)
+        self.ax = self.fig.add_subplot()
+        self.wedges, self.texts, self.autotexts = self.ax.pie(
+            [1, 1], labels=self.LABELS, autopct="%1.0f%%", colors=self.COLORS, startangle=90)
+        self.ax.axis('equal')
+        self.fig.tight_layout(pad=0)
+        self.canvas = FigureCanvasAgg(self.fig)
+
+    def update(self, completed, pending):
+        self.next_counts = (completed, pending)
+        if self.after_id is None:
+            self.after_id = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.after_id = None
+        if self.next_counts == self.counts:
+            return
+        self.counts = self.next_counts
+        self.workers.submit(self.draw, self.counts, key="chart", on_done=self.show)
+
+    @probe
+    def draw(self, counts):
+        # Runs on a worker thread; the lock keeps renders off the figure
+        # while a superseded one is still drawing.
+        with self.lock:
+            if self.fig is None:
+                self.build()
+            total = sum(counts)
+            theta = 90
+            for wedge, text, autotext, value in zip(self.wedges, self.texts, self.autotexts, counts):
+                span = 360 * value / total if total else 0
+                wedge.set_theta1(theta)
+                wedge.set_theta2(theta + span)
+                mid = math.radians(theta + span / 2)
+                x, y = math.cos(mid), math.sin(mid)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment('left' if x > 0 else 'right')
+                autotext.set_position((0.6 * x, 0.6 * y))
+                autotext.set_text("%1.0f%%" % (100 * value / total if total else 0))
+                for artist in (wedge, text, autotext):
+                    artist.set_visible(total > 0)
+                theta += span
+            buf = io.BytesIO()
+            self.canvas.print_png(buf)
+        return base64.b64encode(buf.getvalue()).decode("ascii")
+
+    def show(self, png):
+        self.image = tk.PhotoImage(data=png)
+        self.label.config(image=self.image)
+
+class RenderScheduler:
+    # Mutations mark regions dirty; all marks made before the next idle tick
+    # are flushed together through a single render(dirty) call.
+    def __init__(self, root, render):
+        self.root = root
+        self.render = render
+        self.dirty = set()
+        self.idle_id = None
+        self.delay_id = None
+
+    def mark(self, *regions):
+        self.dirty.update(regions)
+        if self.idle_id is None:
+            self.idle_id = self.root.after_idle(self.flush)
+
+    def mark_later(self, delay, *regions):
+        # Debounce: each call pushes the pending mark back by delay ms.
+        if self.delay_id is not None:
+            self.root.after_cancel(self.delay_id)
+        self.delay_id = self.root.after(delay, self._delayed_mark, regions)
+
+    def _delayed_mark(self, regions):
+        self.delay_id = None
+        self.mark(*regions)
+
+    def flush(self):
+        self.idle_id = None
+        dirty, self.dirty = self.dirty, set()
+        if dirty:
+            self.render(dirty)
+
+class DebugPanel:
+    # Live view of the instrumentation counters; opening it switches the
+    # instrumentation on and closing it switches it off again.
+    def __init__(self, app):
+        self.app = app
+        self.win = tk.Toplevel(app.root)
+        self.win.title("Performance")
+        self.win.protocol("WM_DELETE_WINDOW", app.toggle_debug_panel)
+        self.text = tk.Text(self.win, width=84, height=20, font=("Courier", 10))
+        self.text.pack(fill="both", expand=True, padx=4, pady=4)
+        buttons = tk.Frame(self.win)
+        buttons.pack(pady=(0,4))
+        tk.Button(buttons, text="Dump JSON", command=self.dump).pack(side="left", padx=3)
+        tk.Button(buttons, text="Reset", command=instruments.reset).pack(side="left", padx=3)
+        self.after_id = None
+        self.update()
+
+    def update(self):
+        snap = instruments.snapshot()
+        lines = [f"{'':<30}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        rows = list(snap["probes"].items()) + [("event loop lag", snap["event_loop_lag"])]
+        for name, s in rows:
+            lines.append(f"{name:<30}{s['calls']:>8}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+        w = snap["widgets"]
+        lines.append("")
+        lines.append(f"widgets created {w['created']}, destroyed {w['destroyed']}, task rows pooled "
+                     f"{len(self.app.task_list.active) + sum(map(len, self.app.task_list.pool.values()))}")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.after_id = self.win.after(500, self.update)
+
+    def dump(self):
+        messagebox.showinfo("Instrumentation", f"Saved to {instruments.dump(DATA_DIR)}", parent=self.win)
+
+    def close(self):
+        if self.after_id is not None:
+            self.win.after_cancel(self.after_id)
+        self.win.destroy()
 
 class TodoApp:
-    def __init__(self, root):
+    def __init__(self, root, search_delay=SEARCH_DEBOUNCE_MS):
         self.root = root
+        instruments.install(root)
+        if os.environ.get("TODO_INSTRUMENT"):
+            instruments.set_enabled(True)
+        self.debug_panel = None
+        self.search_delay = search_delay
+        self.scheduler = RenderScheduler(root, self.render)
+        self.workers = WorkerPool(root, on_busy=self.show_busy)
+        self.busy_text = None
         self.theme = "Light"
         self.font_size = "Medium"
-        self.colors = THEMES[self.theme]
+        self.styles = StyleRegistry(root, self.theme, self.font_size)
+        self.colors = self.styles.colors
         self.root.title("Motivational To-Do List")
         self.root.config(bg=self.colors["BG"])
-        self.avatar_images = []
+        self.avatars = AvatarCache(root)
         self.avatar_idx = 0
         self.username = "User"
-        self.load_avatars()
-        self.deleted_task = None
-        self.deleted_index = None
+        self.workspace = Workspace()
+        # With TODO_SYNC=host:port (or a socket path) the list is shared
+        # through a sync server (python todo_cli.py serve) instead.
+        self.sync_address = os.environ.get("TODO_SYNC")
+        self.created_note_shown = False
+        try:
+            self.open_list(self.workspace.active)
+        except StoreLocked as exc:
+            messagebox.showerror("To-Do List", str(exc))
+            root.destroy()
+            raise SystemExit(1)
+        self.undo_timer = None
         self.filter_var = tk.StringVar(value="All")
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda a,b,c: self.refresh_tasks())
+        self.sort_var = tk.StringVar(value="Manual")
+        self.search_var.trace('w', lambda a,b,c: self.scheduler.mark_later(self.search_delay, *DATA_REGIONS))
         self.achievements_var = tk.StringVar(value="")
         self.font_var = tk.StringVar(value=self.font_size)
         self.high_contrast_on = False
@@ -89,6 +463,21 @@ class TodoApp:
             font_menu.add_radiobutton(label=label, variable=self.font_var, command=self.change_fontsize)
         self.font_btn["menu"] = font_menu
         self.font_btn.pack(side="right", padx=5)
+        self.file_btn = tk.Menubutton(topbar, text="File", font=self.get_font('NOTE'), bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
+        file_menu = tk.Menu(self.file_btn, tearoff=False)
+        file_menu.add_command(label="Import...", command=self.import_file)
+        file_menu.add_command(label="Export...", command=self.export_file)
+        file_menu.add_separator()
+        file_menu.add_command(label="Statistics...", command=self.show_trends)
+        self.file_btn["menu"] = file_menu
+        self.file_btn.pack(side="right", padx=5)
+        self.list_btn = tk.Menubutton(topbar, text=f"List: {self.workspace.active}", font=self.get_font('NOTE'), bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
+        self.list_menu = tk.Menu(self.list_btn, tearoff=False, postcommand=self.build_list_menu)
+        self.list_btn["menu"] = self.list_menu
+        self.list_btn.pack(side="right", padx=5)
+        if self.sync_address:
+            # The server decides which list is shared.
+            self.list_btn.config(text=f"List: {self.storage.name} (shared)", state="disabled")
         self.highcont_btn = tk.Checkbutton(topbar, text="High Contrast", variable=tk.BooleanVar(value=False),
                                           command=self.toggle_contrast, font=self.get_font('NOTE'), bg=self.colors["BG"], fg=self.colors["TEXT"])
         self.highcont_btn.pack(side="right", padx=5)
@@ -122,6 +511,11 @@ class TodoApp:
                 selectcolor=self.colors["FRAME"], activebackground=self.colors["BG"]
             )
             b.pack(side="left", padx=(6,0))
+        self.sort_label = tk.Label(search_frame, text="Sort:", font=self.get_font('NOTE'), bg=self.colors["BG"], fg=self.colors["TEXT"])
+        self.sort_label.pack(side="left", padx=(10,2))
+        sort_menu = ttk.Combobox(search_frame, textvariable=self.sort_var, values=SORT_MODES, width=9, font=self.get_font('NOTE'), state='readonly')
+        sort_menu.pack(side="left")
+        sort_menu.bind("<<ComboboxSelected>>", lambda e: self.sort_changed())
 
         # New Task Entry
         entry_frame = tk.Frame(root, bg=self.colors["BG"])
@@ -132,6 +526,7 @@ class TodoApp:
         self.priority_var = tk.StringVar(value="Medium")
         priority_menu = ttk.Combobox(entry_frame, textvariable=self.priority_var, values=list(PRIORITY_LOOKUP.keys()), width=7, font=self.get_font('NOTE'), state='readonly')
         priority_menu.pack(side="left", padx=(5,2))
+        from tkcalendar import DateEntry
         self.deadline_entry = DateEntry(entry_frame, width=12, background='darkblue', foreground='white', borderwidth=2, font=self.get_font('NOTE'))
         self.deadline_entry.set_date(date.today())
         self.deadline_entry.pack(side="left", padx=2)
@@ -146,49 +541,104 @@ class TodoApp:
         self.progress.pack(pady=1, padx=5)
         self.chart_frame = tk.Frame(root, bg=self.colors["BG"])
         self.chart_frame.pack(pady=1)
+        self.chart = CompletionChart(root, self.chart_frame, self.workers)
         self.tasks_frame = tk.Frame(root, bg=self.colors["BG"])
-        self.tasks_frame.pack(pady=6)
+        self.tasks_frame.pack(pady=6, fill="both", expand=True)
+        self.task_list = TaskListView(self, self.tasks_frame)
 
         # Undo
         self.undo_frame = tk.Frame(root, bg=self.colors["BG"])
         self.undo_frame.pack()
         self.setup_shortcuts()
-        self.apply_fonts()
+        self.refresh_tasks()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+        self.root.after(1000, self.sync_storage)
+
+    def open_list(self, name):
+        # Everything bound to a store is created per list; only this list's
+        # tasks are loaded.
+        global tasks
+        if self.sync_address:
+            from sync import SyncClient  # pulls in asyncio; only needed when sharing
+            try:
+                tasks = TaskStore()
+                self.storage = SyncClient(tasks, self.sync_address, root=self.root,
+                                          on_remote=self.on_remote, on_lost=self.on_sync_lost)
+            except OSError as exc:
+                messagebox.showerror("Sync", f"Could not reach the sync server at {self.sync_address}:\n{exc}\n\nOpening the local list instead.")
+                self.sync_address = None
+        if self.sync_address:
+            # The server keeps the data; only this session's totals are kept.
+            self.stats = TaskStats(tasks)
+        else:
+            tasks, self.storage = self.workspace.open(name)
+            if hasattr(self.storage, "fsync"):
+                self.storage.fsync = lambda fd: self.workers.submit(os.fsync, fd, key="fsync")
+            self.stats = TaskStats(tasks, stats_path(self.workspace.folder(name)))
+        self.history = History(tasks)
+        self.deadline_scheduler = DeadlineScheduler(self.root, tasks, self.on_overdue)
+
+    def close_list(self):
+        # An import still running belongs to this list, so it is dropped.
+        self.workers.cancel("import")
+        self.workers.cancel("fsync", wait_running=True)
+        self.busy_text = None
+        self.deadline_scheduler.close()
+        if not self.sync_address:
+            self.workspace.set_summary(self.workspace.active, self.stats.completed, self.stats.total)
+        self.stats.close()
+        self.storage.close()
+
+    def switch_list(self, name):
+        if name == self.workspace.active:
+            return
+        previous = self.workspace.active
+        self.close_list()
+        try:
+            self.open_list(name)
+        except StoreLocked as exc:
+            messagebox.showerror("Lists", str(exc))
+            self.open_list(previous)
+            return
+        self.hide_undo()
+        self.list_btn.config(text=f"List: {name}")
+        # The row pools stay; the new list's rows are shown in the same widgets.
+        self.task_list.offset = 0
         self.refresh_tasks()
 
+    def build_list_menu(self):
+        # Inactive lists are shown from their saved counts, not opened.
+        self.workspace.set_summary(self.workspace.active, self.stats.completed, self.stats.total, save=False)
+        self.list_menu.delete(0, "end")
+        for name in self.workspace.names():
+            done, total = self.workspace.summary(name)
+            mark = "✔ " if name == self.workspace.active else "   "
+            self.list_menu.add_command(label=f"{mark}{name}  ({done}/{total})", command=lambda n=name: self.switch_list(n))
+        self.list_menu.add_separator()
+        self.list_menu.add_command(label="New List...", command=self.new_list)
+
+    def new_list(self):
+        name = simpledialog.askstring("New List", "Name of the new list:", parent=self.root)
+        if not name:
+            return
+        try:
+            name = self.workspace.create(name)
+        except ValueError as exc:
+            messagebox.showerror("New List", str(exc))
+            return
+        self.switch_list(name)
+
     def get_font(self, which, bold=False, italic=False):
-        sz = FONT_SIZES[self.font_var.get()][which]
-        family = 'Helvetica'
-        weight = 'bold' if bold else 'normal'
-        slant = 'italic' if italic else 'roman'
-        return (family, sz, weight, slant)
-
-    def load_avatars(self):
-        self.avatar_images.clear()
-        self.avatar_files = []
-        avatar_folder = os.path.join(os.path.dirname(__file__), "avatars")
-        if not os.path.exists(avatar_folder):
-            os.makedirs(avatar_folder)
-        for i in range(1, 7):
-            fn_png = os.path.join(avatar_folder, f"avatar{i}.png")
-            if os.path.isfile(fn_png):
-                img = Image.open(fn_png).resize((46, 46))
-                self.avatar_images.append(ImageTk.PhotoImage(img))
-                self.avatar_files.append(fn_png)
-        if not self.avatar_images:
-            empty_img = Image.new("RGB", (46,46), "#949494")
-            self.avatar_images = [ImageTk.PhotoImage(empty_img)]
-            self.avatar_files = [None]
-        self.avatar_idx = 0
+        return self.styles.font(which, bold, italic)
 
     def show_avatar_and_username(self):
-        img = self.avatar_images[self.avatar_idx]
+        img = self.avatars.get(self.avatar_idx)
         self.avatar_label.config(image=img, bg=self.colors["BG"])
         self.avatar_label.image = img
         self.username_label.config(text=self.username, fg=self.colors["TEXT"], bg=self.colors["BG"])
 
     def change_avatar(self, event=None):
-        self.avatar_idx = (self.avatar_idx + 1) % len(self.avatar_images)
+        self.avatar_idx = (self.avatar_idx + 1) % len(self.avatars)
         self.show_avatar_and_username()
 
     def change_username(self, event=None):
@@ -215,7 +665,13 @@ class TodoApp:
         order = ["Light", "Dark", "High Contrast"]
         idx = (order.index(self.theme) + 1) % len(order)
         self.theme = order[idx]
-        self.colors = THEMES[self.theme]
+        self.scheduler.mark("theme")
+
+    def apply_theme(self):
+        # Task rows follow the shared ttk styles; only the fixed set of
+        # widgets below is recolored by hand.
+        self.styles.set_theme(self.theme)
+        self.colors = self.styles.colors
         self.root.config(bg=self.colors["BG"])
         self.motivation_lbl.config(bg=self.colors["BG"], fg='#FFFF00' if self.theme=="High Contrast" else '#bbbbcc' if self.theme=="Dark" else '#8888AA')
         self.title.config(bg=self.colors["BG"], fg=self.colors["TEXT"])
@@ -225,42 +681,72 @@ class TodoApp:
         self.username_label.config(bg=self.colors["BG"], fg=self.colors["TEXT"])
         self.theme_btn.config(bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
         self.font_btn.config(bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
+        self.file_btn.config(bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
+        self.list_btn.config(bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"])
         self.highcont_btn.config(bg=self.colors["BG"], fg=self.colors["TEXT"], selectcolor=self.colors["FRAME"])
+        self.sort_label.config(bg=self.colors["BG"], fg=self.colors["TEXT"])
         self.achievements_lbl.config(bg=self.colors["BG"], fg=self.colors["TEXT"])
         self.chart_frame.config(bg=self.colors["BG"])
+        self.chart.label.config(bg=self.colors["BG"])
         self.tasks_frame.config(bg=self.colors["BG"])
-        self.apply_fonts()
-        self.refresh_tasks()
-    
-    def change_fontsize(self):
-        self.apply_fonts()
-        self.refresh_tasks()
+        self.task_list.viewport.config(bg=self.colors["BG"])
 
-    def apply_fonts(self):
-        self.title.config(font=self.get_font('LARGE', bold=True))
-        self.username_label.config(font=self.get_font('TASK', bold=True))
-        self.achievements_lbl.config(font=self.get_font('TASK', bold=True))
-        self.motivation_lbl.config(font=self.get_font('NOTE', italic=True))
-        self.search_entry.config(font=self.get_font('TASK'))
-        self.task_entry.config(font=self.get_font('TASK'))
-        self.progress_label.config(font=self.get_font('NOTE'))
-        self.theme_btn.config(font=self.get_font('NOTE'))
-        self.font_btn.config(font=self.get_font('NOTE'))
-        # Add more static widgets here as needed
+    def change_fontsize(self):
+        self.scheduler.mark("fonts")
 
     def toggle_contrast(self):
         self.theme = "High Contrast" if self.theme != "High Contrast" else "Light"
-        self.colors = THEMES[self.theme]
-        self.font_btn["fg"] = self.colors["BTN_TEXT"]
-        self.switch_theme()
+        self.scheduler.mark("theme")
+
+    def sort_changed(self):
+        # The first time "Created" is picked on a shared list, say how it
+        # orders tasks from different windows.
+        if self.sync_address and self.sort_var.get() == "Created" and not self.created_note_shown:
+            self.created_note_shown = True
+            messagebox.showinfo("Sort", CREATED_NOTE)
+        self.refresh_tasks()
 
     def setup_shortcuts(self):
         self.root.bind('<Control-f>', lambda e: self.search_entry.focus_set())
         self.root.bind('<Control-n>', lambda e: self.task_entry.focus_set())
         self.root.bind('<Control-t>', lambda e: self.switch_theme())
         self.root.bind('<Alt-a>', lambda e: self.add_task())
-        self.root.bind('<Control-q>', lambda e: self.root.quit())
+        self.root.bind('<Control-q>', lambda e: self.quit_app())
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Z>', lambda e: self.redo())
+        self.root.bind('<Control-D>', lambda e: self.toggle_debug_panel())
+        self.root.bind('<Control-P>', lambda e: self.toggle_profile())
+
+    def toggle_debug_panel(self):
+        if self.debug_panel is None:
+            instruments.set_enabled(True)
+            self.debug_panel = DebugPanel(self)
+        else:
+            self.debug_panel.close()
+            self.debug_panel = None
+            instruments.set_enabled(bool(os.environ.get("TODO_INSTRUMENT")))
+
+    def toggle_profile(self):
+        # Ctrl-Shift-P starts a cProfile capture; pressing it again saves it.
+        path = instruments.toggle_profile(DATA_DIR)
+        if path is None:
+            self.root.title("Motivational To-Do List [profiling]")
+        else:
+            self.root.title("Motivational To-Do List")
+            messagebox.showinfo("Profile", f"Saved to {path}\nOpen it with: python -m pstats {os.path.basename(path)}")
+
+    def sync_storage(self):
+        self.storage.sync()
+        self.stats.save()
+        self.root.after(1000, self.sync_storage)
 
+    def quit_app(self):
+        self.close_list()
+        self.workers.shutdown()
+        self.root.destroy()
+
+    @probe
     def add_task(self):
         desc = self.task_entry.get().strip()
         deadline = self.deadline_entry.get_date()
@@ -269,25 +755,88 @@ class TodoApp:
             messagebox.showwarning("Input Error", "Please enter a task description.")
             return
         quote = random.choice(quotes)
-        tasks.append(Task(desc, quote, deadline=deadline, priority=priority))
+        self.history.add(Task(desc, quote, deadline=deadline, priority=priority))
         self.task_entry.delete(0, tk.END)
         self.refresh_tasks()
 
-    def toggle_task(self, idx):
-        tasks[idx].completed = not tasks[idx].completed
-        self.refresh_tasks()
+    def import_file(self):
+        from transfer import parse_batches
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Import Tasks",
+            filetypes=[("Task files", "*.jsonl *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        # The file is parsed on a worker thread; batches are added to the
+        # store here, on the UI thread, as they arrive. Parsing waits while
+        # two batches are still queued, so memory stays bounded.
+        self.import_count = 0
+        self.import_start = time.perf_counter()
+        self.workers.submit(parse_batches, path, batch_size=1000, key="import", busy=True, max_pending=2,
+                            on_progress=self.import_batch,
+                            on_done=lambda count: self.import_done(path, None),
+                            on_error=lambda exc: self.import_done(path, exc))
+
+    def import_batch(self, batch):
+        # Only the progress text changes per batch; relisting the whole store
+        # every batch would make a large import quadratic. import_done
+        # refreshes everything once.
+        self.import_count += tasks.add_many(batch)
+        self.busy_text = f"Importing... {self.import_count:,} tasks"
+        self.progress_label.config(text=self.busy_text)
 
-    def toggle_subtask(self, task_idx, sub_idx):
-        task = tasks[task_idx]
-        task.subtasks[sub_idx]['completed'] = not task.subtasks[sub_idx]['completed']
+    def import_done(self, path, exc):
+        from transfer import rate_text
+        self.busy_text = None
         self.refresh_tasks()
+        if exc is not None:
+            messagebox.showerror("Import Error", f"Could not import {os.path.basename(path)}:\n{exc}")
+            return
+        messagebox.showinfo("Import", rate_text("Imported", self.import_count, time.perf_counter() - self.import_start))
+
+    def show_busy(self, busy):
+        if busy:
+            self.progress.config(mode="indeterminate")
+            self.progress.start(15)
+        else:
+            self.progress.stop()
+            self.progress.config(mode="determinate")
+            self.scheduler.mark("progress")
 
-    def delete_subtask(self, task_idx, sub_idx):
-        del tasks[task_idx].subtasks[sub_idx]
+    def export_file(self):
+        from transfer import export_tasks, rate_text
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Export Tasks", defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            count, seconds = export_tasks(tasks, path)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Export Error", f"Could not export {os.path.basename(path)}:\n{exc}")
+            return
+        messagebox.showinfo("Export", rate_text("Exported", count, seconds))
+
+    def toggle_task(self, task_id):
+        old = tasks.get(task_id).completed
+        self.history.update(task_id, coalesce=True, completed=not old)
+        self.task_changed(task_id, {"completed": old}, {"completed": not old})
+
+    def toggle_subtask(self, task_id, sub_idx):
+        old = tasks.get(task_id).subtasks
+        subs = list(old)
+        subs[sub_idx] = Subtask(subs[sub_idx].desc, not subs[sub_idx].completed)
+        task = self.history.update(task_id, coalesce=True, subtasks=subs)
+        self.task_changed(task_id, {"subtasks": old}, {"subtasks": task.subtasks})
+
+    def delete_subtask(self, task_id, sub_idx):
+        task = tasks.get(task_id)
+        subs = list(task.subtasks)
+        del subs[sub_idx]
+        self.history.update(task_id, subtasks=subs)
         self.refresh_tasks()
 
-    def edit_task(self, idx):
-        task = tasks[idx]
+    def edit_task(self, task_id):
+        task = tasks.get(task_id)
         edit_win = tk.Toplevel(self.root)
         edit_win.title("Edit Task")
         edit_win.config(bg=self.colors["BG"])
@@ -296,6 +845,7 @@ class TodoApp:
         desc_entry.insert(0, task.description)
         desc_entry.pack(pady=4)
         tk.Label(edit_win, text="Edit deadline:", bg=self.colors["BG"], font=self.get_font('TASK')).pack(pady=4)
+        from tkcalendar import DateEntry
         deadline_entry = DateEntry(edit_win, width=15, background='darkblue', foreground='white', borderwidth=2, font=self.get_font('NOTE'))
         deadline_entry.set_date(task.deadline if task.deadline else date.today())
         deadline_entry.pack(pady=4)
@@ -309,26 +859,38 @@ class TodoApp:
         notes_text.pack(pady=4)
         subtasks_frame = tk.LabelFrame(edit_win, text="Subtasks", bg=self.colors["BG"], font=self.get_font('NOTE', bold=True))
         subtasks_frame.pack(pady=8, padx=4, fill="both")
+        # The subtask handlers fetch the task again each time: the SQLite
+        # store may have evicted the object this dialog opened with, and
+        # updates go to the copy it loads instead.
         def refresh_subtasks():
             for w in subtasks_frame.winfo_children():
                 w.destroy()
-            for i, sub in enumerate(task.subtasks):
-                var = tk.BooleanVar(value=sub['completed'])
+            for i, sub in enumerate(tasks.get(task_id).subtasks):
+                var = tk.BooleanVar(value=sub.completed)
                 cb = tk.Checkbutton(
-                    subtasks_frame, text=sub['desc'], variable=var, font=self.get_font('NOTE'),
+                    subtasks_frame, text=sub.desc, variable=var, font=self.get_font('NOTE'),
                     bg=self.colors["BG"], fg=self.colors["TEXT"], command=lambda si=i: toggle_and_update(si))
-                if sub['completed']:
+                if sub.completed:
                     cb.select()
                 cb.grid(row=i, column=0, sticky="w")
                 del_btn = tk.Button(subtasks_frame, text="Delete", bg="#FF4444", fg="white",
                                     font=self.get_font('NOTE'), command=lambda si=i: delete_subtask(si))
                 del_btn.grid(row=i, column=1, padx=5, pady=1)
-        def toggle_and_update(si):
-            task.subtasks[si]['completed'] = not task.subtasks[si]['completed']
+        def update_subtasks(subs, coalesce=False):
+            # The main list is updated too; it rebuilds its rows when the
+            # number of subtasks changes.
+            old = tasks.get(task_id).subtasks
+            self.history.update(task_id, coalesce=coalesce, subtasks=subs)
+            self.task_changed(task_id, {"subtasks": old}, {"subtasks": tasks.get(task_id).subtasks})
             refresh_subtasks()
+        def toggle_and_update(si):
+            subs = list(tasks.get(task_id).subtasks)
+            subs[si] = Subtask(subs[si].desc, not subs[si].completed)
+            update_subtasks(subs, coalesce=True)
         def delete_subtask(si):
-            del task.subtasks[si]
-            refresh_subtasks()
+            subs = list(tasks.get(task_id).subtasks)
+            del subs[si]
+            update_subtasks(subs)
         refresh_subtasks()
         tk.Label(edit_win, text="Add subtask:", bg=self.colors["BG"], font=self.get_font('NOTE')).pack(pady=(7,0))
         new_sub_entry = tk.Entry(edit_win, font=self.get_font('NOTE'), width=25, bg=self.colors["ENTRY"], fg=self.colors["TEXT"])
@@ -336,9 +898,8 @@ class TodoApp:
         def add_subtask():
             desc = new_sub_entry.get().strip()
             if desc:
-                task.subtasks.append({'desc': desc, 'completed': False})
                 new_sub_entry.delete(0, tk.END)
-                refresh_subtasks()
+                update_subtasks(tasks.get(task_id).subtasks + (Subtask(desc),))
         add_sub_btn = tk.Button(edit_win, text="Add", font=self.get_font('NOTE'), bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"], command=add_subtask)
         add_sub_btn.pack(pady=(0,5))
         def save_changes():
@@ -349,183 +910,189 @@ class TodoApp:
             if not new_desc:
                 messagebox.showwarning("Input Error", "Description cannot be empty.")
                 return
-            task.description = new_desc
-            task.deadline = new_deadline
-            task.notes = new_notes
-            task.priority = new_priority
+            self.history.update(task_id, description=new_desc, deadline=new_deadline,
+                                notes=new_notes, priority=new_priority)
             edit_win.destroy()
             self.refresh_tasks()
         save_btn = tk.Button(edit_win, text="Save", font=self.get_font('TASK'), bg=self.colors["BTN"], fg=self.colors["BTN_TEXT"], command=save_changes)
         save_btn.pack(pady=6)
 
-    def delete_task(self, idx):
+    def delete_task(self, task_id):
         confirmed = messagebox.askyesno("Delete Task", "Are you sure you want to delete this task?")
         if confirmed:
-            self.deleted_task = tasks[idx]
-            self.deleted_index = idx
-            del tasks[idx]
+            self.history.delete(task_id)
             self.refresh_tasks()
-            self.show_undo()
+            self.show_undo("Task deleted.")
 
-    def show_undo(self):
+    def show_undo(self, message):
         for widget in self.undo_frame.winfo_children():
             widget.destroy()
-        undo_label = tk.Label(self.undo_frame, text="Task deleted.", font=self.get_font('TASK'), bg=self.colors["BG"], fg="#FF4444")
+        undo_label = tk.Label(self.undo_frame, text=message, font=self.get_font('TASK'), bg=self.colors["BG"], fg="#FF4444")
         undo_label.pack(side="left")
         undo_btn = tk.Button(
             self.undo_frame, text="Undo", font=self.get_font('NOTE', bold=True), bg="#22BB33", fg="#fff",
-            command=self.undelete_task)
+            command=self.undo)
         undo_btn.pack(side="left", padx=5)
-        self.root.after(6000, self.hide_undo)
-
-    def undelete_task(self):
-        if self.deleted_task is not None and self.deleted_index is not None:
-            tasks.insert(self.deleted_index, self.deleted_task)
-            self.deleted_task = None
-            self.deleted_index = None
-            self.refresh_tasks()
-        self.hide_undo()
+        if self.undo_timer is not None:
+            self.root.after_cancel(self.undo_timer)
+        self.undo_timer = self.root.after(6000, self.hide_undo)
 
     def hide_undo(self):
         for widget in self.undo_frame.winfo_children():
             widget.destroy()
-        self.deleted_task = None
-        self.deleted_index = None
-
-    def get_filtered_tasks(self):
-        filter_status = self.filter_var.get()
-        search = self.search_var.get().strip().lower()
-        result = []
-        for t in tasks:
-            match_status = (
-                filter_status == "All" or
-                (filter_status == "Completed" and t.completed) or
-                (filter_status == "Pending" and not t.completed)
-            )
-            match_search = (
-                not search or
-                search in t.description.lower() or
-                search in t.notes.lower() or
-                any(search in sub['desc'].lower() for sub in t.subtasks)
-            )
-            if match_status and match_search:
-                result.append(t)
-        return result
+        if self.undo_timer is not None:
+            self.root.after_cancel(self.undo_timer)
+            self.undo_timer = None
 
-    def show_achievements(self, completed, total):
-        badge = ""
-        if completed >= 20:
-            badge = "🏆 Master Doer! 20+ tasks done!"
-        elif completed >= 10:
-            badge = "🌟 Achiever! 10+ tasks!"
-        elif completed >= 5:
-            badge = "✨ Go-Getter! 5+ completed!"
-        elif completed >= 1:
-            badge = "👍 First steps! Keep going!"
+    def undo(self):
+        entry = self.history.undo()
+        if entry is not None:
+            self.show_history_change(entry, undo=True)
+        self.hide_undo()
+
+    def redo(self):
+        entry = self.history.redo()
+        if entry is not None:
+            self.show_history_change(entry, undo=False)
+
+    def show_history_change(self, entry, undo):
+        if entry[0] == "update":
+            old, new = (entry[3], entry[2]) if undo else (entry[2], entry[3])
+            self.task_changed(entry[1], old, new)
+        else:
+            self.refresh_tasks()
+
+    def on_overdue(self, task_ids):
+        if self.sort_var.get() == "Deadline":
+            # "Today" just became "Earlier"; the group headers move.
+            self.refresh_tasks()
         else:
-            badge = ""
-        self.achievements_var.set(badge)
+            self.task_list.refresh_tasks(task_ids)
 
+    def on_remote(self, changes):
+        # Changes from other windows, as (op, task id, changed fields). As in
+        # task_changed, only the touched rows are redrawn unless the list
+        # itself may change.
+        query, status = self.search_var.get().strip(), self.filter_var.get()
+        sort_field = SORT_FIELDS.get(self.sort_var.get())
+        relist = False
+        for op, task_id, fields in changes:
+            if op == "delete":
+                # Undo could refer to the task that was just removed.
+                self.history.clear()
+                self.hide_undo()
+            if (op != "update" or "subtasks" in fields or sort_field in fields
+                    or ("completed" in fields and status != "All")
+                    or (query and ("description" in fields or "notes" in fields))):
+                relist = True
+        if relist:
+            self.refresh_tasks()
+        else:
+            self.task_list.refresh_tasks([task_id for _, task_id, _ in changes])
+            if any("completed" in fields for _, _, fields in changes):
+                self.scheduler.mark("progress", "achievements", "chart")
+
+    def on_sync_lost(self):
+        messagebox.showwarning("Sync", "Lost the connection to the sync server.\nChanges made from now on stay in this window only.")
+
+    def task_changed(self, task_id, old, new):
+        # Only the task's own rows are redrawn unless the change can move it
+        # in or out of the current filter or change how many rows it has.
+        query, status = self.search_var.get().strip(), self.filter_var.get()
+        old_subs, new_subs = old.get("subtasks", ()), new.get("subtasks", ())
+        relist = (len(old_subs) != len(new_subs) or ("completed" in new and status != "All")
+                  or SORT_FIELDS.get(self.sort_var.get()) in new)
+        if query and not relist:
+            relist = (any(old[f] != new[f] for f in ("description", "notes") if f in new)
+                      or [s.desc for s in old_subs] != [s.desc for s in new_subs])
+        if relist:
+            self.refresh_tasks()
+        else:
+            self.task_list.refresh_tasks([task_id])
+            if "completed" in new:
+                self.scheduler.mark("progress", "achievements", "chart")
+
+    @probe
+    def get_filtered_tasks(self, limit=None, offset=0):
+        return filter_tasks(tasks, self.search_var.get(), self.filter_var.get(), limit=limit, offset=offset,
+                            sort=self.sort_var.get())
+
+    def show_achievements(self, completed, total):
+        self.achievements_var.set(badge_for(completed))
+
+    def show_trends(self):
+        win = tk.Toplevel(self.root)
+        win.title("Statistics")
+        win.config(bg=self.colors["BG"])
+        s = self.stats
+        lines = [
+            f"Completed: {s.completed}/{s.total} ({s.percent}%)",
+            f"Overdue: {s.overdue()}",
+            f"Subtasks done: {s.subtasks_completed}/{s.subtasks} ({int(s.subtask_ratio * 100)}%)",
+        ]
+        for priority, (done, total) in s.by_priority().items():
+            lines.append(f"{priority}: {done}/{total} completed")
+        tk.Label(win, text="\n".join(lines), justify="left", font=self.get_font('TASK'),
+                 bg=self.colors["BG"], fg=self.colors["TEXT"]).pack(padx=10, pady=(8,4), anchor="w")
+        # Completions per day as bars, overall completion rate as a line.
+        days = s.trend(30)
+        width, height, pad = 480, 160, 20
+        canvas = tk.Canvas(win, width=width, height=height + 2 * pad, bg=self.colors["FRAME"], highlightthickness=0)
+        canvas.pack(padx=10, pady=(0,4))
+        step = (width - 2 * pad) / len(days)
+        peak = max(max(done for *_, done in days), 1)
+        points = []
+        for i, (day, completed, total, done) in enumerate(days):
+            x = pad + i * step
+            if done > 0:
+                canvas.create_rectangle(x + 2, pad + height * (1 - done / peak), x + step - 2, pad + height,
+                                        fill="#81C784", outline="")
+            points += [x + step / 2, pad + height * (1 - (completed / total if total else 0))]
+            if i % 7 == 0:
+                canvas.create_text(x, pad + height + 10, text=day.strftime("%m-%d"), anchor="w",
+                                   fill=self.colors["TEXT"], font=self.get_font('NOTE'))
+        canvas.create_line(*points, fill="#407BFF", width=2)
+        tk.Label(win, text=f"Bars: tasks completed per day (max {peak}).  Line: share of all tasks completed.",
+                 font=self.get_font('NOTE'), bg=self.colors["BG"], fg=self.colors["TEXT"]).pack(padx=10, pady=(0,8))
+
+    @probe
     def show_pie_chart(self, completed, pending):
-        for w in self.chart_frame.winfo_children():
-            w.destroy()
-        fig, ax = plt.subplots(figsize=(2.4,2), dpi=100)
-        values = [completed, pending]
-        labels = ["Completed", "Pending"]
-        colors = ["#81C784", "#FFF176"]
-        if sum(values)>0:
-            ax.pie(values, labels=labels, autopct="%1.0f%%",colors=colors,startangle=90)
-        ax.axis('equal')
-        fig.tight_layout(pad=0)
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        chart_widget = canvas.get_tk_widget()
-        chart_widget.pack()
-        fig.patch.set_alpha(0)
+        self.chart.update(completed, pending)
 
+    @probe
     def refresh_tasks(self):
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
-        tasklist = self.get_filtered_tasks()
-        total = len(tasklist)
-        completed = sum(1 for t in tasklist if t.completed)
-        percent = int((completed / total) * 100) if total else 0
-        self.progress["value"] = percent
-        self.progress_label.config(text=f"Displayed: {completed}/{total} completed ({percent}%)")
-        self.show_achievements(completed, total)
-        pending = total - completed
-        self.show_pie_chart(completed, pending)
-        for i, task in enumerate(tasklist):
-            idx = tasks.index(task)
-            color, label = PRIORITY_LOOKUP[task.priority]
-            frame = tk.Frame(self.tasks_frame, bg=self.colors["BG"], pady=2)
-            frame.pack(fill="x", expand=True)
-            canvas = tk.Canvas(frame, width=5, height=26, bg=self.colors["BG"], highlightthickness=0)
-            canvas.pack(side="left", padx=0)
-            canvas.create_rectangle(0,0,8,28,fill=color,outline=color)
-            today = date.today()
-            overdue = not task.completed and task.deadline and (task.deadline < today)
-            var = tk.BooleanVar(value=task.completed)
-            cb = tk.Checkbutton(
-                frame,
-                text=task.description,
-                font=self.get_font('TASK', bold=task.completed),
-                bg=self.colors["BG"],
-                fg='#FFFF00' if self.theme == "High Contrast" and overdue else ('#aa0000' if overdue else self.colors["TEXT"] if not task.completed else '#999'),
-                variable=var,
-                command=lambda idx=idx: self.toggle_task(idx),
-                activebackground=self.colors["BG"],
-                selectcolor=self.colors["BG"]
-            )
-            if task.completed:
-                cb.select()
-            cb.pack(side="left")
-            pri_label = tk.Label(frame, text=f"[{label}]", font=self.get_font('NOTE', bold=True), bg=self.colors["BG"], fg=color, padx=3)
-            pri_label.pack(side="left")
-            deadline_text = f" (Due: {task.deadline.strftime('%Y-%m-%d')})" if task.deadline else ""
-            deadline_lbl = tk.Label(frame, text=deadline_text, font=self.get_font('NOTE'), fg='#FFFF00' if self.theme=="High Contrast" and overdue else '#cc3333' if overdue else '#888888', bg=self.colors["BG"])
-            deadline_lbl.pack(side="left", padx=2)
-            quote_lbl = tk.Label(
-                frame, text=f"“{task.quote}”",
-                font=self.get_font('NOTE', italic=True), fg='#FFFF00' if self.theme=="High Contrast" else '#737373', bg=self.colors["BG"])
-            quote_lbl.pack(side="left", padx=6)
-            if task.notes.strip():
-                notes_preview = task.notes.replace("\n", " ").strip()[:24]
-                if len(task.notes) > 24:
-                    notes_preview += "…"
-                note_lbl = tk.Label(frame, text=f"🗒 {notes_preview}", font=self.get_font('NOTE'), fg='#FFFF00' if self.theme=="High Contrast" else '#555577', bg=self.colors["BG"])
-                note_lbl.pack(side="left", padx=7)
-            edit_btn = tk.Button(
-                frame, text="Edit", bg='#FFA500', fg='white', font=self.get_font('NOTE'),
-                command=lambda idx=idx: self.edit_task(idx))
-            edit_btn.pack(side="right", padx=1)
-            del_btn = tk.Button(
-                frame, text="Delete", bg='#FF4444', fg='white', font=self.get_font('NOTE'),
-                command=lambda idx=idx: self.delete_task(idx))
-            del_btn.pack(side="right", padx=1)
-            if task.subtasks:
-                for j, sub in enumerate(task.subtasks):
-                    sub_frame = tk.Frame(self.tasks_frame, bg=self.colors["BG"])
-                    sub_frame.pack(fill="x", padx=30)
-                    sub_var = tk.BooleanVar(value=sub['completed'])
-                    sub_cb = tk.Checkbutton(
-                        sub_frame,
-                        text=sub['desc'],
-                        font=self.get_font('NOTE', italic=True),
-                        bg=self.colors["BG"],
-                        fg='#FFFF00' if self.theme=="High Contrast" and sub['completed'] else '#25a625' if sub['completed'] else self.colors["TEXT"],
-                        variable=sub_var,
-                        command=lambda tidx=idx, sidx=j: self.toggle_subtask(tidx, sidx),
-                        activebackground=self.colors["BG"],
-                        selectcolor=self.colors["BG"]
-                    )
-                    if sub['completed']:
-                        sub_cb.select()
-                    sub_cb.pack(side="left", anchor="w")
-                    sub_del_btn = tk.Button(
-                        sub_frame, text="Delete", bg='#DD3333', fg='white', font=self.get_font('NOTE'),
-                        command=lambda t=idx, s=j: self.delete_subtask(t, s))
-                    sub_del_btn.pack(side="left", padx=5)
+        self.scheduler.mark(*DATA_REGIONS)
+
+    @probe
+    def render(self, dirty):
+        if "theme" in dirty:
+            self.apply_theme()
+        if "fonts" in dirty:
+            # Every widget refers to the named fonts, so resizing them is all
+            # it takes; the list only needs laying out at the new row height.
+            self.styles.set_size(self.font_var.get())
+            self.task_list.relayout()
+        query, status = self.search_var.get(), self.filter_var.get()
+        if dirty & {"progress", "achievements", "chart"}:
+            # Without a search the running totals answer directly.
+            if query.strip():
+                completed, total = tasks.counts(query, status)
+            else:
+                completed, total = self.stats.counts(status)
+            if "progress" in dirty:
+                percent = int((completed / total) * 100) if total else 0
+                if self.workers.busy:
+                    self.progress_label.config(text=self.busy_text or "Working...")
+                else:
+                    self.progress["value"] = percent
+                    self.progress_label.config(text=f"Displayed: {completed}/{total} completed ({percent}%)")
+            if "achievements" in dirty:
+                self.show_achievements(self.stats.completed, self.stats.total)
+            if "chart" in dirty:
+                self.show_pie_chart(completed, total - completed)
+        if "list" in dirty:
+            sort = self.sort_var.get()
+            self.task_list.set_entries(tasks.search_entries(query, status, sort), sort)
 
 if __name__ == "__main__":
     root = tk.Tk()
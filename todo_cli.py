@@ -0,0 +1,186 @@
+# Command-line front end: python todo_cli.py add|list|complete|search|due|stats|import|export|lists|serve
+import argparse
+import os
+import random
+import sys
+from datetime import date
+from stats import TaskStats, stats_path
+from sorting import CREATED_NOTE, SORT_MODES
+from storage import StoreLocked
+from todo_core import BACKEND, DATA_DIR, PRIORITIES, STATUSES, Task, filter_tasks, quotes, task_stats
+from workspaces import Workspace
+
+
+def format_task(task):
+    mark = "x" if task.completed else " "
+    line = f"[{mark}] {task.id:>5}  {task.description}  [{task.priority.upper()}]"
+    if task.deadline:
+        line += f"  (Due: {task.deadline.strftime('%Y-%m-%d')})"
+    for sub in task.subtasks:
+        line += f"\n          [{'x' if sub.completed else ' '}] {sub.desc}"
+    return line
+
+
+def cmd_add(store, args):
+    deadline = date.fromisoformat(args.deadline) if args.deadline else None
+    task_id = store.add(Task(args.description, random.choice(quotes), deadline=deadline,
+                             notes=args.notes, priority=args.priority))
+    print(f"Added task {task_id}.")
+
+
+def cmd_list(store, args):
+    for task in filter_tasks(store, "", args.status, limit=args.limit, sort=args.sort):
+        print(format_task(task))
+
+
+def cmd_search(store, args):
+    for task in filter_tasks(store, args.query, args.status, limit=args.limit):
+        print(format_task(task))
+
+
+def cmd_complete(store, args):
+    for task_id in args.ids:
+        if task_id not in store:
+            print(f"No task with id {task_id}.", file=sys.stderr)
+            return 1
+        store.update(task_id, completed=not args.undo)
+    return 0
+
+
+def cmd_due(store, args):
+    today = date.today()
+    for task in store.overdue(today):
+        print("OVERDUE " + format_task(task))
+    for task in store.next_due(today, args.next):
+        print(("TODAY   " if task.deadline == today else "        ") + format_task(task))
+
+
+def cmd_stats(store, args):
+    stats = task_stats(store)
+    print(f"Completed: {stats['completed']}/{stats['total']} ({stats['percent']}%)")
+    print(f"Pending:   {stats['pending']}")
+    print(f"Overdue:   {stats['overdue']}")
+    for priority, (done, total) in args.stats.by_priority().items():
+        print(f"{priority + ':':<10} {done}/{total} completed")
+    print(f"Subtasks:  {args.stats.subtasks_completed}/{args.stats.subtasks} completed")
+    done = [n for *_, n in args.stats.trend(7)]
+    print(f"Last 7 days: {sum(done)} completed ({' '.join(map(str, done))})")
+    if stats["badge"]:
+        print(stats["badge"])
+
+
+def cmd_import(store, args):
+    from transfer import import_tasks, rate_text
+    print(rate_text("Imported", *import_tasks(store, args.path)))
+
+
+def cmd_export(store, args):
+    from transfer import export_tasks, rate_text
+    print(rate_text("Exported", *export_tasks(store, args.path)))
+
+
+def cmd_lists(workspace, args):
+    # Works from the saved counts; no list is opened.
+    if args.create:
+        print(f"Created list {workspace.create(args.create)!r}.")
+        return 0
+    for name in workspace.names():
+        done, total = workspace.summary(name)
+        mark = "*" if name == workspace.active else " "
+        print(f"{mark} {name}  ({done}/{total} completed)")
+    return 0
+
+
+def cmd_serve(store, args):
+    from sync import run_server
+    run_server(store, args.storage, args.address, args.list_name)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="todo", description="Motivational To-Do List (command line)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--backend", choices=("journal", "sqlite"), default=BACKEND)
+    parser.add_argument("--list", help="task list to work on (default: the one last opened)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="add a task")
+    p.add_argument("description")
+    p.add_argument("--deadline", help="YYYY-MM-DD")
+    p.add_argument("--priority", choices=PRIORITIES, default="Medium")
+    p.add_argument("--notes", default="")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("list", help="list tasks")
+    p.add_argument("--status", choices=STATUSES, default="All")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--sort", choices=SORT_MODES, default="Manual",
+                   help="Created is the order tasks were added in. " + CREATED_NOTE)
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("search", help="search descriptions, notes and subtasks")
+    p.add_argument("query")
+    p.add_argument("--status", choices=STATUSES, default="All")
+    p.add_argument("--limit", type=int)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("complete", help="mark tasks as completed")
+    p.add_argument("ids", type=int, nargs="+")
+    p.add_argument("--undo", action="store_true", help="mark as pending instead")
+    p.set_defaults(func=cmd_complete)
+
+    p = sub.add_parser("due", help="show overdue tasks and the next ones due")
+    p.add_argument("--next", type=int, default=10, help="how many upcoming tasks to show")
+    p.set_defaults(func=cmd_due)
+
+    p = sub.add_parser("stats", help="show progress statistics")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("import", help="import tasks from .jsonl or .csv")
+    p.add_argument("path")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="export tasks to .jsonl or .csv")
+    p.add_argument("path")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("lists", help="show the task lists")
+    p.add_argument("--create", metavar="NAME", help="add a new, empty list")
+    p.set_defaults(func=cmd_lists)
+
+    p = sub.add_parser("serve", help="share a list with app windows started with TODO_SYNC set")
+    p.add_argument("--address", default=os.environ.get("TODO_SYNC", "127.0.0.1:8765"),
+                   help="host:port, or a path for a Unix socket")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    workspace = Workspace(args.data_dir, args.backend)
+    if args.func is cmd_lists:
+        try:
+            return cmd_lists(workspace, args)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    name = args.list or workspace.active
+    if name not in workspace.lists:
+        print(f"No list called {name!r}; create it with: lists --create {name!r}", file=sys.stderr)
+        return 1
+    try:
+        store, storage = workspace.open(name, activate=False)
+    except StoreLocked as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    args.stats = TaskStats(store, stats_path(workspace.folder(name)))
+    args.storage, args.list_name = storage, name
+    try:
+        return args.func(store, args) or 0
+    finally:
+        workspace.set_summary(name, args.stats.completed, args.stats.total)
+        args.stats.close()
+        storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
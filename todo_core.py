@@ -0,0 +1,51 @@
+# GUI-free entry point to the task model: opening a store, filtering and
+# statistics. Importing this never pulls in tkinter, matplotlib or PIL.
+import os
+from datetime import date
+from task_store import PRIORITIES, Subtask, Task, TaskStore, quotes
+
+DATA_DIR = os.environ.get("TODO_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+BACKEND = os.environ.get("TODO_BACKEND", "journal")
+STATUSES = ("All", "Pending", "Completed")
+
+
+def open_store(data_dir=DATA_DIR, backend=BACKEND):
+    # Returns (store, storage); storage.sync()/close() persist the store.
+    os.makedirs(data_dir, exist_ok=True)
+    if backend == "sqlite":
+        from sqlite_store import SqliteTaskStore
+        store = SqliteTaskStore(os.path.join(data_dir, "tasks.db"))
+        return store, store
+    from storage import JournalStorage
+    store = TaskStore()
+    storage = JournalStorage(data_dir)
+    storage.open(store)
+    return store, storage
+
+
+def filter_tasks(store, query="", status="All", limit=None, offset=0, sort="Manual"):
+    return store.search(query, status, limit=limit, offset=offset, sort=sort)
+
+
+def badge_for(completed):
+    if completed >= 20:
+        return "🏆 Master Doer! 20+ tasks done!"
+    if completed >= 10:
+        return "🌟 Achiever! 10+ tasks!"
+    if completed >= 5:
+        return "✨ Go-Getter! 5+ completed!"
+    if completed >= 1:
+        return "👍 First steps! Keep going!"
+    return ""
+
+
+def task_stats(store, query="", status="All", today=None):
+    completed, total = store.counts(query, status)
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "percent": int((completed / total) * 100) if total else 0,
+        "overdue": store.count_overdue(today or date.today()),
+        "badge": badge_for(completed),
+    }
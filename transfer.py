@@ -0,0 +1,124 @@
+import csv
+import json
+import random
+import time
+from datetime import date
+from storage import decode_task, encode_task
+from task_store import Subtask, Task, quotes
+
+CSV_FIELDS = ["description", "quote", "deadline", "completed", "notes", "subtasks", "priority"]
+BATCH_SIZE = 5000
+
+
+def file_format(path):
+    ext = path.rsplit(".", 1)[-1].lower()
+    if ext == "csv":
+        return "csv"
+    if ext in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    raise ValueError(f"unsupported file type: {path}")
+
+
+def export_record(task):
+    rec = encode_task(task)
+    del rec["id"]
+    return rec
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                rec.pop("id", None)
+                rec.setdefault("quote", random.choice(quotes))
+                yield decode_task(rec)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            subtasks = row.get("subtasks") or ""
+            yield Task(
+                row["description"],
+                row.get("quote") or random.choice(quotes),
+                deadline=date.fromisoformat(row["deadline"]) if row.get("deadline") else None,
+                completed=(row.get("completed") or "").strip().lower() in ("1", "true", "yes", "y"),
+                notes=row.get("notes") or "",
+                subtasks=[Subtask.from_dict(d) for d in json.loads(subtasks)] if subtasks else None,
+                priority=row.get("priority") or "Medium",
+            )
+
+
+def write_jsonl(tasklist, path):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for task in tasklist:
+            f.write(json.dumps(export_record(task), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def write_csv(tasklist, path):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for task in tasklist:
+            rec = export_record(task)
+            rec["deadline"] = rec["deadline"] or ""
+            rec["completed"] = "true" if rec["completed"] else "false"
+            rec["subtasks"] = json.dumps(rec["subtasks"], ensure_ascii=False) if rec["subtasks"] else ""
+            writer.writerow(rec)
+            count += 1
+    return count
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_tasks(path):
+    reader = read_csv if file_format(path) == "csv" else read_jsonl
+    return reader(path)
+
+
+def parse_batches(path, progress, batch_size=BATCH_SIZE):
+    # Only parses: each batch of new tasks goes to progress(batch), so this
+    # can run on a worker thread while the caller adds them to the store.
+    count = 0
+    for batch in batches(read_tasks(path), batch_size):
+        progress(batch)
+        count += len(batch)
+    return count
+
+
+def import_tasks(store, path, batch_size=BATCH_SIZE, progress=None):
+    # Streams the file in batches so only one batch of parsed rows is held
+    # at a time; returns (count, seconds).
+    start = time.perf_counter()
+    count = 0
+    for batch in batches(read_tasks(path), batch_size):
+        count += store.add_many(batch)
+        if progress is not None:
+            progress(count)
+    return count, time.perf_counter() - start
+
+
+def export_tasks(tasklist, path):
+    writer = write_csv if file_format(path) == "csv" else write_jsonl
+    start = time.perf_counter()
+    count = writer(tasklist, path)
+    return count, time.perf_counter() - start
+
+
+def rate_text(verb, count, seconds):
+    rate = count / seconds if seconds > 0 else count
+    return f"{verb} {count} tasks in {seconds:.2f}s ({rate:,.0f} tasks/s)"
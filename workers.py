@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+POLL_MS = 30
+# Longest a single poll may spend running callbacks before handing control
+# back to the Tk event loop.
+POLL_BUDGET = 0.02
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, pool, key, busy, on_done, on_error, on_progress, max_pending=None):
+        self.pool = pool
+        self.key = key
+        self.busy = busy
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self.cancelled = False
+        self.finished = False
+        # With max_pending, at most that many reports wait in the queue;
+        # report() blocks the worker until the UI thread has taken one.
+        self.slots = threading.Semaphore(max_pending) if max_pending else None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None and self.future.cancel():
+            # Never started, so no result will come back for it.
+            self.pool._finish(self)
+
+    def report(self, value):
+        # Called on the worker thread. A superseded job is stopped here, at
+        # its next report.
+        if self.slots is not None:
+            while not self.slots.acquire(timeout=0.1):
+                if self.cancelled:
+                    raise JobCancelled()
+        if self.cancelled:
+            raise JobCancelled()
+        self.pool.results.put((self, "progress", value))
+
+
+class WorkerPool:
+    # Runs slow jobs on a few threads. Results, errors and progress reports
+    # go through a queue that the Tk thread drains on a root.after poll, so
+    # every callback runs on the UI thread. Submitting a job under a key
+    # cancels the previous job with that key; its result is dropped.
+    def __init__(self, root, max_workers=2, on_busy=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="todo-worker")
+        self.results = queue.SimpleQueue()
+        self.latest = {}
+        self.running = 0
+        self.busy = 0
+        self.poll_id = None
+
+    def submit(self, fn, *args, key=None, busy=False, on_done=None, on_error=None, on_progress=None,
+               max_pending=None, **kwargs):
+        # busy jobs switch on the progress indicator; with on_progress, fn is
+        # also passed progress=job.report, bounded by max_pending reports.
+        if key is not None and key in self.latest:
+            self.latest[key].cancel()
+        job = Job(self, key, busy, on_done, on_error, on_progress, max_pending)
+        if key is not None:
+            self.latest[key] = job
+        if on_progress is not None:
+            kwargs["progress"] = job.report
+        self.running += 1
+        if busy:
+            self.busy += 1
+            if self.busy == 1 and self.on_busy is not None:
+                self.on_busy(True)
+        job.future = self.executor.submit(self._run, job, fn, args, kwargs)
+        if self.poll_id is None:
+            self.poll_id = self.root.after(POLL_MS, self.poll)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            if job.cancelled:
+                raise JobCancelled()
+            result = fn(*args, **kwargs)
+        except JobCancelled:
+            self.results.put((job, "cancelled", None))
+        except Exception as exc:
+            self.results.put((job, "error", exc))
+        else:
+            self.results.put((job, "done", result))
+
+    def _finish(self, job):
+        if job.finished:
+            return
+        job.finished = True
+        self.running -= 1
+        if self.latest.get(job.key) is job:
+            del self.latest[job.key]
+        if job.busy:
+            self.busy -= 1
+            if not self.busy and self.on_busy is not None:
+                self.on_busy(False)
+
+    def poll(self):
+        self.poll_id = None
+        deadline = time.perf_counter() + POLL_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                job, kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind != "progress":
+                self._finish(job)
+            elif job.slots is not None:
+                job.slots.release()
+            if job.cancelled:
+                continue
+            try:
+                if kind == "progress":
+                    job.on_progress(value)
+                elif kind == "done" and job.on_done is not None:
+                    job.on_done(value)
+                elif kind == "error":
+                    if job.on_error is None:
+                        raise value
+                    job.on_error(value)
+            except Exception as exc:
+                self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+        if self.running or not self.results.empty():
+            self.poll_id = self.root.after(POLL_MS, self.poll)
+
+    def cancel(self, key, wait_running=False):
+        # Cancels the latest job under key; with wait_running, also blocks
+        # until it returns if it had already started.
+        job = self.latest.get(key)
+        if job is None:
+            return
+        job.cancel()
+        if wait_running:
+            wait([job.future])
+
+    def shutdown(self):
+        for job in list(self.latest.values()):
+            job.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
@@ -0,0 +1,73 @@
+import json
+import os
+import re
+from todo_core import BACKEND, DATA_DIR, open_store
+
+LISTS_FILE = "lists.json"
+DEFAULT_LIST = "Default"
+
+
+class Workspace:
+    # Named task lists. "Default" lives in the data directory itself, so
+    # existing data keeps working; other lists get a folder under lists/.
+    # Only the list being worked on is opened. The others are known by the
+    # summary counts saved in lists.json.
+    def __init__(self, data_dir=DATA_DIR, backend=BACKEND):
+        self.data_dir = data_dir
+        self.backend = backend
+        self.path = os.path.join(data_dir, LISTS_FILE)
+        self.lists = {DEFAULT_LIST: {"dir": "", "completed": 0, "total": 0}}
+        self.active = DEFAULT_LIST
+        if os.path.isfile(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.lists.update(data.get("lists", {}))
+            if data.get("active") in self.lists:
+                self.active = data["active"]
+
+    def names(self):
+        return list(self.lists)
+
+    def folder(self, name):
+        sub = self.lists[name]["dir"]
+        return os.path.join(self.data_dir, sub) if sub else self.data_dir
+
+    def summary(self, name):
+        info = self.lists[name]
+        return info["completed"], info["total"]
+
+    def set_summary(self, name, completed, total, save=True):
+        self.lists[name].update(completed=completed, total=total)
+        if save:
+            self.save()
+
+    def create(self, name):
+        name = name.strip()
+        if not name:
+            raise ValueError("the list needs a name")
+        if name in self.lists:
+            raise ValueError(f"there is already a list called {name!r}")
+        slug = re.sub(r"[^a-z0-9_-]+", "-", name.lower()).strip("-") or "list"
+        used = {info["dir"] for info in self.lists.values()}
+        folder, n = os.path.join("lists", slug), 1
+        while folder in used or os.path.exists(os.path.join(self.data_dir, folder)):
+            n += 1
+            folder = os.path.join("lists", f"{slug}-{n}")
+        self.lists[name] = {"dir": folder, "completed": 0, "total": 0}
+        self.save()
+        return name
+
+    def open(self, name, activate=True):
+        # Returns (store, storage) for the list, like open_store().
+        store, storage = open_store(self.folder(name), self.backend)
+        if activate:
+            self.active = name
+            self.save()
+        return store, storage
+
+    def save(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"active": self.active, "lists": self.lists}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)